@@ -1,40 +1,580 @@
+import array
+import json
+import mmap
+import os
+import struct
+import zlib
+import numpy as np
 import pycosat
-from itertools import product
+from cells import CellSet
+from metrics import DISABLED
+from itertools import chain, product
 
 
 LOGICTRACE = False
 
+KB_CACHE_VERSION = 2
+KB_CACHE_DIR = os.environ.get(
+    "MAZE_KB_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "maze-navigation")
+)
+KB_HEADER = struct.Struct("<4sIIIIII")
+MAX_WITNESS_MODELS = 32
+
+
+class SatSession:
+    """
+    Persistent solver session over the clauses of a KB. The clause list is shared
+    with the KB and never copied, the literals proved to be entailed are kept as
+    learned unit clauses and the last satisfying model is reused as long as it
+    still satisfies every clause added since it was found.
+
+    The models found while computing backbones are kept as witnesses of the
+    literals they falsify, which are not entailed while their witness is valid.
+    New clauses that break a witness mark its literals as dirty
+    """
+
+    def __init__(self, clauses, metrics=None) -> None:
+        """
+        Class constructor
+
+        Args:
+            clauses (list): DIMACS clause list of the KB, shared with the session
+            metrics (Metrics, optional): where the solver calls are counted.
+                Defaults to None.
+        """
+        self.clauses = clauses
+        self.metrics = metrics or DISABLED
+        self.learned = []
+        self.entailed = set()
+        self.model = None
+        self.models = {}
+        self.witnessed = {}
+        self.witness = {}
+        self.dirty = set()
+        self.next_model = 0
+        # Number of calls to the SAT solver
+        self.calls = 0
+        # Number of queries answered by earlier models or proofs, without the solver
+        self.reused = 0
+
+    def add_clause(self, dimacs):
+        """
+        Adds a clause to the session. The cached model is dropped if it does not
+        satisfy the new clause, and so are the witnesses it breaks
+
+        Args:
+            dimacs (list): clause in DIMACS format
+        """
+        self.clauses.append(dimacs)
+        if self.model is not None and not self.satisfied_by_model(dimacs):
+            self.model = None
+        for mid, model in list(self.models.items()):
+            if not self.satisfied_by_model(dimacs, model):
+                self.drop_witness(mid)
+
+    def satisfied_by_model(self, dimacs, model=None):
+        """
+        Checks if a model satisfies a clause
+
+        Args:
+            dimacs (list): clause in DIMACS format
+            model (set, optional): true literals of the model. Defaults to the cached model.
+
+        Returns:
+            bool: whether any literal of the clause is true in the model
+        """
+        model = self.model if model is None else model
+        return any(lit in model for lit in dimacs)
+
+    def add_witness(self, model, literals):
+        """
+        Keeps a model as the witness of the literals it makes false
+
+        Args:
+            model (set): true literals of a model of the KB
+            literals (set): literals without a witness
+
+        Returns:
+            set: the literals that are true in the model, so still without a witness
+        """
+        refuted = {lit for lit in literals if lit not in model}
+        if refuted:
+            if len(self.models) >= MAX_WITNESS_MODELS:
+                # The model that refutes the fewest literals is the cheapest to lose
+                self.drop_witness(
+                    min(self.witnessed, key=lambda mid: len(self.witnessed[mid]))
+                )
+            mid = self.next_model
+            self.next_model += 1
+            self.models[mid] = model
+            self.witnessed[mid] = refuted
+            for lit in refuted:
+                self.witness[lit] = mid
+        return literals - refuted
+
+    def drop_witness(self, mid):
+        """
+        Forgets a witness model, marking the literals it refuted as dirty
+
+        Args:
+            mid (int): id of the model
+        """
+        del self.models[mid]
+        for lit in self.witnessed.pop(mid):
+            if self.witness.get(lit) == mid:
+                del self.witness[lit]
+                self.dirty.add(lit)
+
+    def take_dirty(self):
+        """
+        Returns the literals whose witness has been broken since the last call.
+        They are the only non-entailed literals that may have become entailed
+
+        Returns:
+            set: the dirty literals
+        """
+        dirty = self.dirty
+        self.dirty = set()
+        return dirty
+
+    def solve(self, assumptions=(), extra=()):
+        """
+        Solves the KB plus the learned clauses under a set of assumptions. If it is
+        satisfiable, the model found becomes the cached model
+
+        Args:
+            assumptions (iterable, optional): literals assumed to be true. Defaults to ().
+            extra (iterable, optional): additional clauses for this call only. Defaults to ().
+
+        Returns:
+            bool: whether the KB is satisfiable under the assumptions
+        """
+        self.calls += 1
+        answer = pycosat.solve(
+            chain(self.clauses, self.learned, extra, ([a] for a in assumptions))
+        )
+        self.metrics.count("sat_calls")
+        if answer == "UNSAT":
+            self.metrics.count("unsat")
+            return False
+        self.metrics.count("sat")
+        self.model = set(answer)
+        return True
+
+    def entails(self, dimacs):
+        """
+        Checks if the KB entails a clause, that is, if the KB together with the
+        negation of every literal of the clause is UNSAT
+
+        Args:
+            dimacs (list): clause in DIMACS format
+
+        Returns:
+            bool: whether the clause is entailed
+        """
+        if len(dimacs) == 1 and dimacs[0] in self.entailed:
+            self.reused += 1
+            return True
+        if self.model is not None and not self.satisfied_by_model(dimacs):
+            # The cached model satisfies the KB and falsifies the clause
+            self.reused += 1
+            return False
+        if self.solve([-lit for lit in dimacs]):
+            return False
+        if len(dimacs) == 1:
+            self.entailed.add(dimacs[0])
+            self.learned.append(dimacs)
+        return True
+
+    def backbone(self, literals):
+        """
+        Finds which of the candidate literals are entailed by the KB. Every model
+        found discards all the candidates it makes false, so only a few solver
+        calls are needed no matter how many candidates there are. Candidates with
+        a valid witness are discarded without calling the solver
+
+        Args:
+            literals (iterable): candidate literals in DIMACS format
+
+        Returns:
+            set: the candidate literals entailed by the KB
+        """
+        entailed = set()
+        remaining = set()
+        for lit in literals:
+            if lit in self.entailed:
+                entailed.add(lit)
+            elif lit not in self.witness:
+                remaining.add(lit)
+        self.reused += len(literals) - len(remaining)
+        if remaining and self.model is None:
+            self.solve()
+        while remaining:
+            if self.model is not None:
+                remaining = self.add_witness(self.model, remaining)
+                if not remaining:
+                    break
+            # Look for a model where at least one of the candidates left is false
+            if not self.solve(extra=[[-lit for lit in remaining]]):
+                for lit in remaining:
+                    self.entailed.add(lit)
+                    self.learned.append([lit])
+                entailed |= remaining
+                break
+        return entailed
+
+    def consistent_with(self, clauses):
+        """
+        Checks if the KB stays satisfiable after adding a set of clauses,
+        without modifying it
+
+        Args:
+            clauses (list): clauses in DIMACS format
+
+        Returns:
+            bool: whether the KB plus the clauses is satisfiable
+        """
+        if self.model is not None and all(
+            self.satisfied_by_model(dimacs) for dimacs in clauses
+        ):
+            return True
+        return self.solve(extra=clauses)
+
+
+class UnitPropagator:
+    """
+    Watched-literal unit propagation over the clauses of a KB. Every literal it
+    assigns at the root is entailed by the KB, and probing the negation of a
+    clause proves it is entailed whenever propagation reaches a conflict
+    """
+
+    def __init__(self) -> None:
+        """
+        Class constructor
+        """
+        self.value = {}
+        self.trail = []
+        self.watches = {}
+        self.inconsistent = False
+
+    def value_of(self, lit):
+        """
+        Returns the value of a literal in the current assignment
+
+        Args:
+            lit (int): literal in DIMACS format
+
+        Returns:
+            bool: True or False if it is assigned, None otherwise
+        """
+        value = self.value.get(abs(lit))
+        if value is None or lit > 0:
+            return value
+        return not value
+
+    def add_clause(self, dimacs):
+        """
+        Adds a clause, watching two of its literals that are not false, and
+        propagates it if it is unit at the root
+
+        Args:
+            dimacs (list): clause in DIMACS format
+        """
+        if self.inconsistent:
+            return
+        clause = [lit for lit in dict.fromkeys(dimacs) if self.value_of(lit) is not False]
+        if any(self.value_of(lit) for lit in clause):
+            # Root assignments are permanent, so the clause will always be satisfied
+            return
+        if not clause:
+            self.inconsistent = True
+        elif len(clause) == 1:
+            if not self.propagate([clause[0]]):
+                self.inconsistent = True
+        else:
+            self.watches.setdefault(clause[0], []).append(clause)
+            self.watches.setdefault(clause[1], []).append(clause)
+
+    def add_clauses(self, clauses):
+        """
+        Adds many clauses at once. Before anything is assigned, every clause can
+        watch its first two literals without checking them, and the unit clauses
+        are propagated together at the end
+
+        Args:
+            clauses (list): clauses in DIMACS format, owned by the propagator
+                from now on
+        """
+        if self.trail or self.inconsistent:
+            for dimacs in clauses:
+                self.add_clause(dimacs)
+            return
+        watches = self.watches
+        units = []
+        for clause in clauses:
+            if len(clause) > 1 and clause[0] == clause[1]:
+                clause = list(dict.fromkeys(clause))
+            if len(clause) > 1:
+                watches.setdefault(clause[0], []).append(clause)
+                watches.setdefault(clause[1], []).append(clause)
+            elif clause:
+                units.append(clause[0])
+            else:
+                self.inconsistent = True
+                return
+        if units and not self.propagate(units):
+            self.inconsistent = True
+
+    def propagate(self, literals):
+        """
+        Assigns the literals and propagates them
+
+        Args:
+            literals (list): literals to make true
+
+        Returns:
+            bool: False if a conflict was found, True otherwise
+        """
+        queue = []
+        for lit in literals:
+            value = self.value_of(lit)
+            if value is False:
+                return False
+            if value is None:
+                self.value[abs(lit)] = lit > 0
+                self.trail.append(lit)
+                queue.append(lit)
+        while queue:
+            false_lit = -queue.pop()
+            watching = self.watches.get(false_lit, [])
+            kept = []
+            conflict = False
+            for ind, clause in enumerate(watching):
+                if conflict:
+                    kept.extend(watching[ind:])
+                    break
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], clause[0]
+                other = clause[0]
+                if self.value_of(other):
+                    kept.append(clause)
+                    continue
+                for k in range(2, len(clause)):
+                    if self.value_of(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches.setdefault(clause[1], []).append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if self.value_of(other) is False:
+                        conflict = True
+                    else:
+                        self.value[abs(other)] = other > 0
+                        self.trail.append(other)
+                        queue.append(other)
+            self.watches[false_lit] = kept
+            if conflict:
+                return False
+        return True
+
+    def probe(self, literals):
+        """
+        Checks if assuming the literals leads to a conflict by unit propagation.
+        The assignment is undone afterwards
+
+        Args:
+            literals (list): literals to assume
+
+        Returns:
+            bool: whether a conflict was found
+        """
+        level = len(self.trail)
+        conflict = not self.propagate(literals)
+        for lit in self.trail[level:]:
+            del self.value[abs(lit)]
+        del self.trail[level:]
+        return conflict
+
+
+class MazeEncoding:
+    """
+    Maps the propositions of the logical maze to DIMACS variables arithmetically,
+    so no names have to be built or parsed while reasoning. The variable of a
+    proposition is kind * n**2 + row * n + col + 1. After them come the registers
+    of the sequential counters that bound how many instances of each cause there are
+    """
+
+    PRECIPICE = 0
+    MONSTER = 1
+    EXIT = 2
+    KINDS = ["P", "M", "S", "EP", "EM", "ES"]
+    COUNTS = {"P": 3, "M": 1, "S": 1}
+
+    def __init__(self, n, counts=None) -> None:
+        """
+        Class constructor
+
+        Args:
+            n (int): the dimension of the board
+            counts (dict, optional): number of instances of each cause (P, M and S).
+                Defaults to COUNTS.
+        """
+        self.n = n
+        self.cells = n * n
+        self.counts = [
+            {**self.COUNTS, **(counts or {})}[kind] for kind in self.KINDS[:3]
+        ]
+        self.counter_base = []
+        self.num_vars = len(self.KINDS) * self.cells
+        for k in self.counts:
+            self.counter_base.append(self.num_vars)
+            self.num_vars += self.cells * k
+
+    def var(self, kind, row, col):
+        """
+        Returns the variable of a proposition
+
+        Args:
+            kind (int): index of the proposition kind in KINDS
+            row (int): row
+            col (int): column
+
+        Returns:
+            int: the DIMACS variable
+        """
+        return kind * self.cells + row * self.n + col + 1
+
+    def stimulus(self, cause, row, col):
+        """
+        Returns the variable of the stimulus produced by a cause
+
+        Args:
+            cause (int): PRECIPICE, MONSTER or EXIT
+            row (int): row
+            col (int): column
+
+        Returns:
+            int: the DIMACS variable
+        """
+        return self.var(cause + 3, row, col)
+
+    def counter(self, cause, i, j):
+        """
+        Returns the register of the sequential counter of a cause that is true
+        when there are at least j instances of the cause among the first i + 1 cells
+
+        Args:
+            cause (int): PRECIPICE, MONSTER or EXIT
+            i (int): index of the cell in row-major order
+            j (int): count, between 1 and the number of instances of the cause
+
+        Returns:
+            int: the DIMACS variable
+        """
+        return self.counter_base[cause] + i * self.counts[cause] + j
+
+    def cell(self, var):
+        """
+        Returns the cell of a cause or stimulus variable
+
+        Args:
+            var (int): the DIMACS variable
+
+        Returns:
+            tuple: row and column
+        """
+        return divmod((var - 1) % self.cells, self.n)
+
+    def name(self, var):
+        """
+        Builds the readable name of a variable, such as P1_2, or #P4>=2 for
+        the counter registers
+
+        Args:
+            var (int): the DIMACS variable
+
+        Returns:
+            str: the name of the proposition
+        """
+        if var > self.counter_base[0]:
+            cause = max(c for c in range(3) if var > self.counter_base[c])
+            i, j = divmod(var - self.counter_base[cause] - 1, self.counts[cause])
+            return f"#{self.KINDS[cause]}{i}>={j + 1}"
+        kind, cell = divmod(var - 1, self.cells)
+        row, col = divmod(cell, self.n)
+        return f"{self.KINDS[kind]}{row}_{col}"
+
 
 class Logic:
     """
     Logical agent class
     """
 
-    def __init__(self) -> None:
+    def __init__(self, encoding=None, metrics=None) -> None:
+        """
+        Class constructor
+
+        Args:
+            encoding (MazeEncoding, optional): encoding whose variables are used as
+                integer literals. Symbols are numbered after them. Defaults to None.
+            metrics (Metrics, optional): where the solver calls and the size of the KB
+                are reported. Defaults to None.
+        """
+        self.encoding = encoding
+        self.metrics = metrics or DISABLED
+        self.reserved = encoding.num_vars if encoding else 0
         self.kb = []
         self.symbols = []
+        self.symbol_ids = {}
+        self.clause_set = set()
+        self.session = SatSession(self.kb, self.metrics)
+        self.propagator = UnitPropagator()
+        # Queries decided by unit propagation, queries decided by earlier models or
+        # proofs of the session, and calls to the SAT solver
+        self.stats = {"propagation": 0, "witness": 0, "solver": 0}
 
     def clean(self):
         self.kb = []
         self.symbols = []
+        self.symbol_ids = {}
+        self.clause_set = set()
+        self.session = SatSession(self.kb, self.metrics)
+        self.propagator = UnitPropagator()
+        self.stats = {"propagation": 0, "witness": 0, "solver": 0}
 
     def to_number(self, symbol):
+        if isinstance(symbol, int):
+            return symbol
         if symbol[0] == "-":
             sign = -1
             symbol = symbol[1:]
         else:
             sign = 1
 
-        if symbol in self.symbols:
-            return (self.symbols.index(symbol) + 1) * sign
-        else:
+        number = self.symbol_ids.get(symbol)
+        if number is None:
             self.symbols.append(symbol)
-            return len(self.symbols) * sign
+            number = self.symbol_ids[symbol] = self.reserved + len(self.symbols)
+        return number * sign
+
+    def symbol_name(self, var):
+        """
+        Returns the name of a variable, built on demand for encoded ones
+
+        Args:
+            var (int): the DIMACS variable
+
+        Returns:
+            str: the name of the symbol
+        """
+        if var <= self.reserved:
+            return self.encoding.name(var)
+        return self.symbols[var - self.reserved - 1]
 
     def process_clause(self, clause):
         """
         Takes a list as a collection of signed literals, and results in DIMACS format clause, signed integer list
-        that represents the clause
+        that represents the clause. Integer literals are already in DIMACS format
         """
         # A clause is a list of ORs
         l_clause = [clause] if not isinstance(clause, list) else clause
@@ -45,7 +585,7 @@ class Logic:
         """From DIMACS to symbols based clause"""
         clause = []
         for i in dimacs:
-            symbol = f"{'-' if i < 0 else ''}{self.symbols[abs(i)-1]}"
+            symbol = f"{'-' if i < 0 else ''}{self.symbol_name(abs(i))}"
             clause.append(symbol)
         return clause
 
@@ -58,11 +598,14 @@ class Logic:
         """
         l_clause = [clause] if not isinstance(clause, list) else clause
         dimacs = self.process_clause(l_clause)
-        # Avoid repetition of clauses
-        if dimacs not in self.kb:
+        # Avoid repetition of clauses, regardless of the order of their literals
+        canonical = tuple(sorted(dimacs))
+        if canonical not in self.clause_set:
+            self.clause_set.add(canonical)
             if LOGICTRACE:
                 print(f"Adding {l_clause} converted as {dimacs} to the KB")
-            self.kb.append(dimacs)
+            self.session.add_clause(dimacs)
+            self.propagator.add_clause(dimacs)
 
     def add_clause_list_to_kb(self, clauseList):
         """
@@ -73,7 +616,9 @@ class Logic:
 
     def dumpKB(self):
         """Prints the KB in a readable, symbolic form"""
-        print(f"There are {len(self.kb)} clauses with {len(self.symbols)} symbols")
+        print(
+            f"There are {len(self.kb)} clauses with {self.reserved + len(self.symbols)} symbols"
+        )
         for i, dimacs in enumerate(self.kb):
             print(f"#{i}: {dimacs} ==> {self.dimacs_to_symbol(dimacs)}")
 
@@ -85,22 +630,181 @@ class Logic:
             for i, dimacs in enumerate(self.kb):
                 f.write(f"#{i}: {dimacs} ==> {self.dimacs_to_symbol(dimacs)}\n")
 
+    def save_kb(self, fn):
+        """
+        Writes the KB and its symbol table to a binary file that load_kb can
+        memory-map. The file holds a header, the clause offsets, the literals
+        of every clause and the symbols as JSON. The header ends with the
+        size and the CRC-32 of the rest, so a damaged file is detected
+
+        Args:
+            fn (str): path of the file
+        """
+        offsets = array.array("i", [0])
+        literals = array.array("i")
+        for dimacs in self.kb:
+            literals.extend(sorted(dimacs))
+            offsets.append(len(literals))
+        body = offsets.tobytes() + literals.tobytes() + json.dumps(self.symbols).encode()
+        header = KB_HEADER.pack(
+            b"MKB\0",
+            KB_CACHE_VERSION,
+            self.reserved,
+            len(self.kb),
+            len(literals),
+            len(body),
+            zlib.crc32(body),
+        )
+        tmp = f"{fn}.{os.getpid()}.tmp"
+        with open(tmp, mode="wb") as f:
+            f.write(header)
+            f.write(body)
+        os.replace(tmp, fn)
+
+    def load_kb(self, fn):
+        """
+        Replaces the KB with the one stored in a file written by save_kb. The
+        literals are read in one pass and the propagator is built in bulk
+
+        Args:
+            fn (str): path of the file
+
+        Raises:
+            ValueError: if the file is not a KB file of the current version, is
+                truncated or damaged, or was written for another encoding
+        """
+        with open(fn, mode="rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mm:
+            if len(mm) < KB_HEADER.size:
+                raise ValueError(f"{fn} is truncated")
+            magic, version, reserved, n_clauses, n_literals, size, crc = (
+                KB_HEADER.unpack_from(mm)
+            )
+            if magic != b"MKB\0" or version != KB_CACHE_VERSION:
+                raise ValueError(f"{fn} is not a version {KB_CACHE_VERSION} KB file")
+            if reserved != self.reserved:
+                raise ValueError(f"{fn} was written for another encoding")
+            start = KB_HEADER.size
+            end = start + 4 * (n_clauses + 1)
+            if len(mm) != start + size or size < end - start + 4 * n_literals:
+                raise ValueError(f"{fn} is truncated")
+            with memoryview(mm) as view:
+                if zlib.crc32(view[start:]) != crc:
+                    raise ValueError(f"{fn} is damaged")
+                offsets = view[start:end].cast("i").tolist()
+                flat = view[end : end + 4 * n_literals].cast("i").tolist()
+            symbols = json.loads(mm[end + 4 * n_literals :])
+        bounds = list(zip(offsets, offsets[1:]))
+        self.clean()
+        self.kb.extend(flat[a:b] for a, b in bounds)
+        # Clauses are stored sorted, so they are already canonical
+        self.clause_set.update(map(tuple, self.kb))
+        self.propagator.add_clauses([flat[a:b] for a, b in bounds])
+        for symbol in symbols:
+            self.to_number(symbol)
+
     def ask_kb(self, clause, verbose=False):
         """
         Returns True if the current KB, augmented by the negation of the given clause, proves UNSAT
         which means the current KB entails the given clause
         """
-        qKB = [dim for dim in self.kb]
         dimacsClause = self.process_clause(clause)
-        negated = self.negate_dimacs(dimacsClause)
-        for d in negated:
-            qKB.append(d)
-        answer = pycosat.solve(qKB)
+        entailed = self.propagated_entailment(dimacsClause)
+        if entailed is not None:
+            self.stats["propagation"] += 1
+        else:
+            calls, reused = self.session.calls, self.session.reused
+            entailed = self.session.entails(dimacsClause)
+            self.stats["solver"] += self.session.calls - calls
+            self.stats["witness"] += self.session.reused - reused
+            if entailed and len(dimacsClause) == 1:
+                self.propagator.add_clause(dimacsClause)
         if LOGICTRACE:
             print(
-                f"Question for negation of {clause} answers {answer} and so {clause} is {answer=='UNSAT'}"
+                f"Question for negation of {clause} answers {'UNSAT' if entailed else 'SAT'} and so {clause} is {entailed}"
             )
-        return answer == "UNSAT"
+        return entailed
+
+    def propagated_entailment(self, dimacs):
+        """
+        Tries to decide if the KB entails a clause with unit propagation alone
+
+        Args:
+            dimacs (list): clause in DIMACS format
+
+        Returns:
+            bool: whether the clause is entailed, or None if propagation cannot tell
+        """
+        propagator = self.propagator
+        if propagator.inconsistent:
+            return True
+        values = [propagator.value_of(lit) for lit in dimacs]
+        if True in values:
+            return True
+        if all(value is False for value in values):
+            # The KB is satisfiable and implies the negation of the clause
+            return False
+        if propagator.probe([-lit for lit in dimacs]):
+            return True
+        return None
+
+    def backbone(self, candidate_literals):
+        """
+        Returns the candidate literals entailed by the current KB, computed
+        with a few solver calls instead of one ask_kb per literal. Literals
+        assigned by unit propagation are decided without the solver
+
+        Args:
+            candidate_literals (list): signed literals to check
+
+        Returns:
+            set: the candidate literals the KB entails
+        """
+        dimacs = {}
+        entailed = set()
+        for symbol in candidate_literals:
+            lit = self.to_number(symbol)
+            value = self.propagator.value_of(lit)
+            if value is None:
+                dimacs[lit] = symbol
+            elif value:
+                entailed.add(symbol)
+        self.stats["propagation"] += len(candidate_literals) - len(dimacs)
+        calls, reused = self.session.calls, self.session.reused
+        found = self.session.backbone(dimacs)
+        self.stats["solver"] += self.session.calls - calls
+        self.stats["witness"] += self.session.reused - reused
+        for lit in found:
+            self.propagator.add_clause([lit])
+        entailed.update(dimacs[lit] for lit in found)
+        if LOGICTRACE:
+            print(f"Backbone of {len(dimacs)} candidates has {len(entailed)} literals")
+        return entailed
+
+    def take_dirty(self):
+        """
+        Returns the literals whose status may have changed because of the clauses
+        added since the last call, see SatSession.take_dirty
+
+        Returns:
+            set: the dirty literals in DIMACS format
+        """
+        return self.session.take_dirty()
+
+    def is_entailed(self, literal):
+        """
+        Checks if a literal is already known to be entailed, without calling the solver
+
+        Args:
+            literal (int): literal in DIMACS format
+
+        Returns:
+            bool: whether it has been proved to be entailed
+        """
+        return literal in self.session.entailed or bool(
+            self.propagator.value_of(literal)
+        )
 
     def check_kb_vs_clause_set(self, clauses):
         """
@@ -109,13 +813,8 @@ class Logic:
 
         Does not modify current KB
         """
-        qKB = [dim for dim in self.kb]
-        for clause in clauses:
-            dimacsClause = self.process_clause(clause)
-            qKB.append(dimacsClause)
-        answer = pycosat.solve(qKB)
-        comp = not (answer == "UNSAT")
-        return comp
+        dimacsClauses = [self.process_clause(clause) for clause in clauses]
+        return self.session.consistent_with(dimacsClauses)
 
     def allModelsforKB(self):
         """Returns a list of atoms that satisfy the KB
@@ -130,152 +829,311 @@ class LogicalAgent:
     This is the agent that helps us in the logical maze
     """
 
-    def __init__(self, n) -> None:
+    def __init__(self, n, counts=None, cache=True, metrics=None) -> None:
         """
         This is the constructor of our logical agent. We create an instance of the Logic class
         so that it can reason about the information it receives and add the initial conditions
 
         Args:
             n (int): the dimension of the board
+            counts (dict, optional): number of precipices (P), monsters (M) and exits (S)
+                in the maze. Defaults to 3, 1 and 1.
+            cache (bool, optional): whether to load the initial KB from the on-disk
+                cache, compiling and storing it there if missing. Defaults to True.
+            metrics (Metrics, optional): metrics of the run. Defaults to None.
         """
-        self.logic = Logic()
+        self.encoding = MazeEncoding(n, counts)
+        self.logic = Logic(self.encoding, metrics)
         self.n = n
-        self.max_precipice = False
-        self.found_precipices = 0
+        self.known = CellSet(n)
+        # Set of known cells of the caller, which only grows, and how much of it is copied
+        self.known_source = None
+        self.known_count = 0
+        self.frontier = set()
+        self.proven = set()
+        # Literals to check in the next percept, at first whether every cell has something
+        self.unresolved = set()
+        for x, y in product(range(n), repeat=2):
+            self.unresolved.update(self.cell_literals(x, y)[:3])
+        if cache:
+            self.load_initial_conditions()
+        else:
+            self.add_initial_conditions()
+
+    def cache_path(self):
+        """
+        Returns the path of the cached initial KB, which only depends on the
+        size of the maze and the number of instances of each cause
+
+        Returns:
+            str: path of the cache file
+        """
+        p, m, s = self.encoding.counts
+        return os.path.join(
+            KB_CACHE_DIR, f"kb-v{KB_CACHE_VERSION}-n{self.n}-P{p}M{m}S{s}.bin"
+        )
+
+    def load_initial_conditions(self):
+        """
+        Loads the initial KB from the cache. If it is not there, it is compiled
+        and written so that later agents of the same size can map it
+        """
+        fn = self.cache_path()
+        try:
+            self.logic.load_kb(fn)
+            return
+        except (OSError, ValueError, struct.error):
+            pass
         self.add_initial_conditions()
+        try:
+            os.makedirs(KB_CACHE_DIR, exist_ok=True)
+            self.logic.save_kb(fn)
+        except OSError:
+            # The cache is an optimization, a read-only disk is not an error
+            pass
+
+    def get_adjacents(self, x, y):
+        """
+        Given a row and a column, returns the cells adjacent to it
+
+        Args:
+            x (int): row
+            y (int): column
+
+        Returns:
+            list: adjacent cells (up, down, left and right)
+        """
+        adj = []
+        if x > 0:
+            adj.append((x - 1, y))
+        if x < self.n - 1:
+            adj.append((x + 1, y))
+        if y > 0:
+            adj.append((x, y - 1))
+        if y < self.n - 1:
+            adj.append((x, y + 1))
+        return adj
+
+    def cell_literals(self, x, y):
+        """
+        Returns the literals asked about a cell: whether it holds a monster, a
+        precipice or the exit, and whether it does not. The negative ones are only
+        asked about the cells adjacent to known cells, because proving each of them
+        false needs its own model
+
+        Args:
+            x (int): row
+            y (int): column
+
+        Returns:
+            list: literals in DIMACS format
+        """
+        enc = self.encoding
+        causes = (enc.MONSTER, enc.PRECIPICE, enc.EXIT)
+        positive = [enc.var(cause, x, y) for cause in causes]
+        return positive + [-i for i in positive]
+
+    def cardinality_clauses(self, cause):
+        """
+        Encodes that there are exactly k instances of a cause with a sequential
+        counter, which needs O(k * n**2) clauses instead of the O(n**4) of pairwise
+        exclusion. Register (i, j) is true iff at least j of the first i + 1 cells
+        hold the cause
+
+        Args:
+            cause (int): PRECIPICE, MONSTER or EXIT
+
+        Returns:
+            list: the clauses of the constraint
+        """
+        enc = self.encoding
+        k = enc.counts[cause]
+        cells = [enc.var(cause, x, y) for x, y in product(range(self.n), repeat=2)]
+        if k == 0:
+            return [[-x] for x in cells]
+        clauses = []
+        s = lambda i, j: enc.counter(cause, i, j)
+        clauses.append([-cells[0], s(0, 1)])
+        clauses.append([cells[0], -s(0, 1)])
+        clauses.extend([[-s(0, j)] for j in range(2, k + 1)])
+        for i in range(1, len(cells)):
+            x = cells[i]
+            clauses.append([-x, -s(i - 1, k)])  # never more than k
+            for j in range(1, k + 1):
+                clauses.append([-s(i - 1, j), s(i, j)])
+                clauses.append([s(i - 1, j), x, -s(i, j)])
+                if j == 1:
+                    clauses.append([-x, s(i, j)])
+                else:
+                    clauses.append([-x, -s(i - 1, j - 1), s(i, j)])
+                    clauses.append([s(i - 1, j), s(i - 1, j - 1), -s(i, j)])
+        clauses.append([s(len(cells) - 1, k)])  # never less than k
+        return clauses
 
     def add_initial_conditions(self):
         """
         We add the initial conditions to the KB. These conditions are that:
         - There is a stimulus if and only if the cause is in an adjacent cell
         - There are no two causes in the same cell
-        - There is no more than one instance of each cause (except precipices)
+        - There is an exact number of instances of each cause
 
-        S represents exit, M monster, and P precipice. An E in front means it is the stimulus
+        S represents exit, M monster, and P precipice. Their stimuli are EP, EM and ES
         """
-        stimuli = ["EP", "EM", "ES"]
-        causes = ["P", "M", "S"]
+        enc = self.encoding
+        causes = [enc.PRECIPICE, enc.MONSTER, enc.EXIT]
         initial_clause_list = []
-        tiles = [i for i in product(list(range(self.n)), repeat=2)]
-
-        for _ in range(len(tiles)):
-            x, y = tiles.pop(0)
-            for stimulus, cause in zip(stimuli, causes):
-                adj = []
-                if x > 0:
-                    adj.append(f"{cause}{x-1}{y}")
-                if x < self.n - 1:
-                    adj.append(f"{cause}{x+1}{y}")
-                if y > 0:
-                    adj.append(f"{cause}{x}{y-1}")
-                if y < self.n - 1:
-                    adj.append(f"{cause}{x}{y+1}")
-                initial_clause_list.append([f"-{stimulus}{x}{y}"] + adj)
+
+        for x, y in product(range(self.n), repeat=2):
+            for cause in causes:
+                stimulus = enc.stimulus(cause, x, y)
+                adj = [enc.var(cause, a, b) for a, b in self.get_adjacents(x, y)]
+                initial_clause_list.append([-stimulus] + adj)
                 initial_clause_list.extend(
-                    [
-                        [f"{stimulus}{x}{y}", f"-{adj[i]}"] for i in range(len(adj))
-                    ]  # stimulus and cause
+                    [[stimulus, -i] for i in adj]  # stimulus and cause
                 )
-                if cause != "P":
-                    for i in tiles:
-                        initial_clause_list.append(
-                            [f"-{cause}{x}{y}", f"-{cause}{i[0]}{i[1]}"]  # exclusion
-                        )
 
-            initial_clause_list.append([f"-M{x}{y}", f"-P{x}{y}"])  # Do not share cells
-            initial_clause_list.append([f"-M{x}{y}", f"-S{x}{y}"])
-            initial_clause_list.append([f"-S{x}{y}", f"-P{x}{y}"])
+            m = enc.var(enc.MONSTER, x, y)
+            p = enc.var(enc.PRECIPICE, x, y)
+            s = enc.var(enc.EXIT, x, y)
+            initial_clause_list.append([-m, -p])  # Do not share cells
+            initial_clause_list.append([-m, -s])
+            initial_clause_list.append([-s, -p])
 
+        for cause in causes:
+            initial_clause_list.extend(self.cardinality_clauses(cause))
         self.logic.add_clause_list_to_kb(initial_clause_list)
 
     def process_percept(self, percept, position, known_cells, at_exit, at_monster):
         """
         Given a percept, the player's position, and the known cells, we see if
-        the model has been able to extract any additional information
+        the model has been able to extract any additional information.
+
+        Only the cells whose status could have changed are asked about: those with
+        a literal marked as dirty by the new clauses. Proven cells are remembered
+        and never asked about again
 
         Args:
             percept (list): list of 1s and 0s with information about the percepts
             position (list): player's position in the maze
-            known_cells (list): list of cells whose content is known
+            known_cells (CellSet): cells whose content is known
             at_exit (bool): if the player is at the exit
             at_monster (bool): if the player is at the monster
 
         Returns:
             list, list, list, list: lists with the cells whose content has been discovered
-                                    (nothing, monster, precipice, and exit in that order)
+                                    in this step (nothing, monster, precipice, and exit in that order)
         """
         safe = []
         monster = []
         precipice = []
         exit = []
-        percept_dict = {0: "EP", 1: "EM", 2: "ES"}
-        for ind, i in enumerate(percept[:3]):
-            stimulus = percept_dict.get(ind, "G")
-            if i == 1:
-                self.logic.add_to_kb([f"{stimulus}{position[0]}{position[1]}"])
-            elif ind < 3:
-                self.logic.add_to_kb([f"-{stimulus}{position[0]}{position[1]}"])
+        enc = self.encoding
+        causes = [enc.PRECIPICE, enc.MONSTER, enc.EXIT]
+        for cause, i in zip(causes, percept[:3]):
+            stimulus = enc.stimulus(cause, position[0], position[1])
+            self.logic.add_to_kb([stimulus if i == 1 else -stimulus])
         # No precipice in the current cell or the player would be dead
 
         if not at_monster:
-            self.logic.add_to_kb([f"-M{position[0]}{position[1]}"])
-        self.logic.add_to_kb([f"-P{position[0]}{position[1]}"])
+            self.logic.add_to_kb([-enc.var(enc.MONSTER, position[0], position[1])])
+        self.logic.add_to_kb([-enc.var(enc.PRECIPICE, position[0], position[1])])
         if not at_exit:
-            self.logic.add_to_kb([f"-S{position[0]}{position[1]}"])
-        for i in product(list(range(self.n)), repeat=2):
-            # We ask the model if it knows what is in each of the cells
-            if list(i) not in known_cells:
-                if self.max_precipice:
-                    self.logic.add_to_kb([f"-P{i[0]}{i[1]}"])
-                m, p, s = [
-                    self.logic.ask_kb(f"M{i[0]}{i[1]}"),
-                    self.logic.ask_kb(f"P{i[0]}{i[1]}"),
-                    self.logic.ask_kb(f"S{i[0]}{i[1]}"),
-                ]
-                if m:  # monster
-                    monster.append(list(i))
-                elif p:  # precipice
-                    precipice.append(list(i))
-                elif s:  # exit
-                    exit.append(list(i))
-            else:
+            self.logic.add_to_kb([-enc.var(enc.EXIT, position[0], position[1])])
+        if known_cells is self.known_source and len(known_cells) >= self.known_count:
+            self.known.update(known_cells.added_since(self.known_count))
+        else:
+            self.known_source = known_cells
+            self.known.update(known_cells)
+        self.known_count = len(known_cells)
+        for cell in self.get_adjacents(position[0], position[1]):
+            if cell not in self.frontier:
                 # We see if the adjacent cells are safe
                 #
                 # (only the adjacent ones because they are the only ones from which we could have received a stimulus)
-                adj = []
-                if i[0] > 0:
-                    if [i[0] - 1, i[1]] not in known_cells:
-                        adj.append([i[0] - 1, i[1]])
-                if i[0] < self.n - 1:
-                    if [i[0] + 1, i[1]] not in known_cells:
-                        adj.append([i[0] + 1, i[1]])
-                if i[1] > 0:
-                    if [i[0], i[1] - 1] not in known_cells:
-                        adj.append([i[0], i[1] - 1])
-                if i[1] < self.n - 1:
-                    if [i[0], i[1] + 1] not in known_cells:
-                        adj.append([i[0], i[1] + 1])
-                for x, y in adj:
-                    nm, np, ns = [
-                        self.logic.ask_kb(f"-M{x}{y}"),
-                        self.logic.ask_kb(f"-P{x}{y}"),
-                        self.logic.ask_kb(f"-S{x}{y}"),
-                    ]
-                    # If there is none of those three elements, it is 'safe'
-                    if nm and np and ns:
-                        safe.append([x, y])
-        self.found_precipices += len(precipice)
-        if self.found_precipices == 3:
-            self.max_precipice = True
-            self.found_precipices = 0
-        if self.max_precipice:
-            self.max_precipice = False
+                self.frontier.add(cell)
+                self.unresolved.update(self.cell_literals(*cell)[3:])
+        self.unresolved |= self.logic.take_dirty()
+        candidates = []
+        for lit in self.unresolved:
+            cell = enc.cell(abs(lit))
+            if cell not in self.known and cell not in self.proven:
+                if lit > 0 or cell in self.frontier:
+                    candidates.append(lit)
+        self.unresolved = set()
+        # A single backbone computation answers every question
+        entailed = self.logic.backbone(candidates)
+        for x, y in sorted({enc.cell(abs(lit)) for lit in entailed}):
+            m, p, s = self.cell_literals(x, y)[:3]
+            if self.logic.is_entailed(m):  # monster
+                monster.append([x, y])
+            elif self.logic.is_entailed(p):  # precipice
+                precipice.append([x, y])
+            elif self.logic.is_entailed(s):  # exit
+                exit.append([x, y])
+            elif all(self.logic.is_entailed(-i) for i in (m, p, s)):
+                # If there is none of those three elements, it is 'safe'
+                safe.append([x, y])
+            else:
+                continue
+            self.proven.add((x, y))
+        logic = self.logic
+        logic.metrics.gauge("clauses", len(logic.kb))
+        logic.metrics.gauge("symbols", logic.reserved + len(logic.symbols))
         return safe, monster, precipice, exit
 
 
-class BayesianAgent:
+class BeliefView:
     """
-    This is the class of the agent that helps you in the Bayesian maze
+    Read-only view of the probability matrix of a MarginalBelief that indexes like
+    an (n, n, 5) array but only computes the cells that are read
+    """
+
+    def __init__(self, beliefs, row=None) -> None:
+        """
+        Class constructor
+
+        Args:
+            beliefs (MarginalBelief): the beliefs
+            row (int, optional): row the view is restricted to. Defaults to None.
+        """
+        self.beliefs = beliefs
+        self.row = row
+
+    @property
+    def shape(self):
+        n = self.beliefs.n
+        return (n, 5) if self.row is not None else (n, n, 5)
+
+    def __len__(self):
+        return self.beliefs.n
+
+    def __getitem__(self, key):
+        if self.row is not None:
+            key = (self.row, key) if not isinstance(key, tuple) else (self.row, *key)
+        elif not isinstance(key, tuple):
+            return BeliefView(self.beliefs, key)
+        if np.ndim(key[0]) or np.ndim(key[1]):
+            cells = np.asarray(key[0]) * self.beliefs.n + np.asarray(key[1])
+            values = self.beliefs.read(cells)
+        else:
+            values = self.beliefs.probability(key[0], key[1])
+        return values[..., key[2]] if len(key) > 2 else values
+
+    def __array__(self, dtype=None, copy=None):
+        dense = self.beliefs.dense()
+        if self.row is not None:
+            dense = dense[self.row]
+        return dense if dtype is None else dense.astype(dtype)
+
+
+class MarginalBelief:
+    """
+    Belief backend that keeps an independent probability for each element in each cell.
+
+    Updates only touch the neighbourhood of the percept. The probability of a cause
+    in a cell is its stored value times a global scale of the cause, which absorbs
+    the renormalization of every other cell. Once a stimulus has been felt, the
+    cause can only be in the cells of its support, and any other value is stale
     """
 
     def __init__(self, n) -> None:
@@ -283,70 +1141,328 @@ class BayesianAgent:
         We initialize the probability matrix so that everything is 1/n**2-1 except the initial one which
         is all 0 because there can be nothing in the initial one
 
+        The beliefs are kept as an (n**2 + 1, 5) array, one row per cell plus an extra
+        row that is always 0 and pads the neighbourhoods of the border cells
+
         Args:
             n (int): the size of the maze
         """
-        self.probability_matrix = [
-            [[1 / (n**2 - 1) for _ in range(5)] for _ in range(n)] for _ in range(n)
-        ]
-        self.probability_matrix[0][0] = [0 for _ in range(5)]
         self.n = n
+        self.belief = np.full((n * n + 1, 5), 1 / (n**2 - 1))
+        self.belief[0] = 0
+        self.belief[-1] = 0
+        self.scale = np.ones(5)
+        self.support = [None] * 5
+        self.neighbourhoods = self.build_neighbourhoods()
 
-    def process_percepts(self, percept_0, position):
+    @property
+    def probability_matrix(self):
         """
-        For each cell and for each cause we update the probabilities
-        based on the percepts we have received
+        Read-only (n, n, 5) view of the probability of each element in each cell
+
+        Returns:
+            BeliefView: the probability matrix
+        """
+        return BeliefView(self)
+
+    def build_neighbourhoods(self):
+        """
+        Precomputes, for every cell, the flat indices of the cell and its adjacents.
+        Missing adjacents of border cells point to the padding row
+
+        Returns:
+            np.ndarray: (n**2, 5) array of indices into the beliefs
+        """
+        n = self.n
+        rows, cols = np.divmod(np.arange(n * n), n)
+        neighbourhoods = np.full((n * n, 5), n * n)
+        neighbourhoods[:, 0] = np.arange(n * n)
+        for ind, (dx, dy) in enumerate([(-1, 0), (1, 0), (0, -1), (0, 1)], start=1):
+            x, y = rows + dx, cols + dy
+            inside = (x >= 0) & (x < n) & (y >= 0) & (y < n)
+            neighbourhoods[inside, ind] = x[inside] * n + y[inside]
+        return neighbourhoods
+
+    def read(self, cells):
+        """
+        Returns the probabilities of some cells, folding in the scales and supports
 
         Args:
-            percept_0 (list): list of 1s and 0s with the percepts
+            cells (np.ndarray): flat cell indices
+
+        Returns:
+            np.ndarray: (len(cells), 5) array of probabilities
+        """
+        values = self.belief[cells] * self.scale
+        for ind, support in enumerate(self.support):
+            if support is not None:
+                values[:, ind] *= np.isin(cells, list(support))
+        return values
+
+    def probability(self, row, col):
+        """
+        Returns the probability of each element in a cell
+
+        Args:
+            row (int): row
+            col (int): column
+
+        Returns:
+            np.ndarray: the 5 probabilities
+        """
+        return self.read(np.array([row * self.n + col]))[0]
+
+    def dense(self):
+        """
+        Computes the whole probability matrix
+
+        Returns:
+            np.ndarray: (n, n, 5) array of probabilities
+        """
+        values = self.belief[:-1] * self.scale
+        for ind, support in enumerate(self.support):
+            if support is not None:
+                inside = list(support)
+                kept = values[inside, ind]
+                values[:, ind] = 0
+                values[inside, ind] = kept
+        return values.reshape(self.n, self.n, 5)
+
+    def update(self, percept, position):
+        """
+        For each cause we update the probabilities based on the percepts we have
+        received. Only the cells of the neighbourhood of the player are written
+
+        Args:
+            percept (list): list of 1s and 0s with the percepts of the 5 causes
             position (list): the player's position
+
+        Returns:
+            int: number of cells written
         """
-        percept = percept_0.copy()
-        percept = percept[:5]
-
-        adjacents = self.get_adjacents(position[0], position[1])
-        for ind, i in enumerate(percept):
-            prob_in_adj = self.prob_cause_in_adjacents(adjacents, ind)
-            for fnd, row in enumerate(self.probability_matrix):
-                for cnd, cell in enumerate(row):
-                    if i:
-                        # there is a stimulus
-                        likelihood = 1 if [fnd, cnd] in adjacents else 0
-                        cell[ind] = likelihood * cell[ind] / prob_in_adj  # bayes
-                    else:
-                        # there is no stimulus
-                        likelihood = 1 if [fnd, cnd] not in adjacents else 0
-                        cell[ind] = likelihood * cell[ind] / (1 - prob_in_adj)  # bayes
+        percept = np.asarray(percept, dtype=bool)
+        present = np.flatnonzero(percept)
+        absent = np.flatnonzero(~percept)
+        adjacents = self.neighbourhoods[position[0] * self.n + position[1]]
+        inside = self.read(adjacents)
+        prob_in_adj = inside.sum(axis=0)
+
+        # there is a stimulus: the cause is in one of the adjacents (bayes)
+        self.belief[np.ix_(adjacents, present)] = (
+            inside[:, present] / prob_in_adj[present]
+        )
+        self.scale[present] = 1
+        for ind in present:
+            self.support[ind] = set(adjacents.tolist()) - {self.n * self.n}
+        # there is no stimulus: the cause is anywhere else (bayes)
+        self.scale[absent] /= 1 - prob_in_adj[absent]
+        self.belief[np.ix_(adjacents, absent)] = 0
+        return int((adjacents < self.n * self.n).sum())
 
-    def get_adjacents(self, f, c):
+
+class ParticleBelief:
+    """
+    Belief backend that keeps a fixed number of sampled mazes (particles). Each
+    particle holds the cell of the fire, spike and dart traps, the monster, the
+    exit and Kurtz, so the constraints of the maze generation hold jointly: the
+    start is empty and the traps never share a cell with M, S or CK
+    """
+
+    TRAPS = [0, 1, 2]
+    OTHERS = [3, 4, 5]
+
+    def __init__(self, n, particles=2000, seed=None) -> None:
         """
-        Given a row and a column, returns a list with the adjacent cells and the cell itself
+        Class constructor
 
         Args:
-            f (int): row
-            c (int): column
+            n (int): the size of the maze
+            particles (int, optional): number of particles. Defaults to 2000.
+            seed (int, optional): seed of the random generator. Defaults to None.
+        """
+        self.n = n
+        self.size = particles
+        self.rng = np.random.default_rng(seed)
+        # Cells where each element can be given all the percepts so far
+        self.allowed = np.ones((6, n * n), dtype=bool)
+        self.allowed[:, 0] = False
+        self.particles = self.sample(particles)
+        self.weights = np.full(particles, 1 / particles)
+        self.matrix = None
+
+    @property
+    def probability_matrix(self):
+        """
+        Read-only (n, n, 5) view of the probability of each element in each cell,
+        estimated from the weighted particles
 
         Returns:
-            list: list with the adjacent cells and the cell itself
+            np.ndarray: the probability matrix
         """
-        adjacents = [[f, c]]
-        for x, y in [(f - 1, c), (f + 1, c), (f, c - 1), (f, c + 1)]:
-            if x in range(0, self.n) and y in range(0, self.n):
-                adjacents.append([x, y])
-        return adjacents
+        if self.matrix is None:
+            cells = self.n * self.n
+            flat = self.particles[:, :5] + np.arange(5) * cells
+            counts = np.bincount(
+                flat.ravel(),
+                weights=np.repeat(self.weights, 5),
+                minlength=5 * cells,
+            )
+            self.matrix = counts.reshape(5, self.n, self.n).transpose(1, 2, 0)
+            self.matrix.flags.writeable = False
+        return self.matrix
 
-    def prob_cause_in_adjacents(self, adjacents, ind):
+    def sample(self, count):
         """
-        Returns the probability that a cause is in a cell or its adjacents
+        Samples particles from the allowed cells of each element, rejecting
+        the ones where a trap shares a cell with M, S or CK
 
         Args:
-            adjacents (list): the cell and its adjacents
-            ind (int): which element the probability is being calculated for
+            count (int): number of particles
 
         Returns:
-            float: the sought probability
+            np.ndarray: (count, 6) array with the cell of each element
+        """
+        particles = np.empty((count, 6), dtype=np.int64)
+        pending = np.arange(count)
+        while pending.size:
+            for element in range(6):
+                particles[pending, element] = self.rng.choice(
+                    np.flatnonzero(self.allowed[element]), size=pending.size
+                )
+            pending = pending[~self.valid(particles[pending])]
+        return particles
+
+    def valid(self, particles):
+        """
+        Checks the joint constraints of the maze generation
+
+        Args:
+            particles (np.ndarray): (k, 6) array of particles
+
+        Returns:
+            np.ndarray: boolean mask of the valid particles
+        """
+        traps = particles[:, self.TRAPS, None]
+        others = particles[:, None, self.OTHERS]
+        return ~(traps == others).any(axis=(1, 2))
+
+    def in_neighbourhood(self, cells, position):
+        """
+        Checks which cells are the position or one of its adjacents
+
+        Args:
+            cells (np.ndarray): flat cell indices
+            position (list): the player's position
+
+        Returns:
+            np.ndarray: boolean mask
+        """
+        rows, cols = np.divmod(cells, self.n)
+        return np.abs(rows - position[0]) + np.abs(cols - position[1]) <= 1
+
+    def update(self, percept, position):
+        """
+        Reweights the particles with the percept, resampling them when the
+        effective sample size drops below half of the population
+
+        Args:
+            percept (list): list of 1s and 0s with the percepts of the 5 causes
+            position (list): the player's position
+
+        Returns:
+            int: number of cells whose probabilities may change, all of them
+        """
+        percept = np.asarray(percept, dtype=bool)
+        neighbourhood = self.in_neighbourhood(np.arange(self.n * self.n), position)
+        self.allowed[:5] &= neighbourhood == percept[:, None]
+        consistent = (
+            self.in_neighbourhood(self.particles[:, :5], position) == percept
+        ).all(axis=1)
+        self.weights = self.weights * consistent
+        total = self.weights.sum()
+        self.matrix = None
+        if total == 0:
+            # Every hypothesis was wrong, start again from the allowed cells
+            self.particles = self.sample(self.size)
+            self.weights = np.full(self.size, 1 / self.size)
+            return self.n * self.n
+        self.weights /= total
+        if 1 / np.square(self.weights).sum() < self.size / 2:
+            self.resample()
+        return self.n * self.n
+
+    def resample(self):
+        """
+        Systematic resampling followed by a Metropolis sweep that proposes moving
+        each element of every particle to another allowed cell, accepted if the
+        constraints still hold, so that the resampled copies do not stay identical
+        """
+        positions = (self.rng.random() + np.arange(self.size)) / self.size
+        indices = np.searchsorted(np.cumsum(self.weights), positions)
+        particles = self.particles[np.minimum(indices, self.size - 1)]
+        for element in range(6):
+            moved = particles.copy()
+            moved[:, element] = self.rng.choice(
+                np.flatnonzero(self.allowed[element]), size=self.size
+            )
+            accept = self.valid(moved)
+            particles[accept] = moved[accept]
+        self.particles = particles
+        self.weights = np.full(self.size, 1 / self.size)
+
+
+class BayesianAgent:
+    """
+    This is the class of the agent that helps you in the Bayesian maze
+    """
+
+    def __init__(
+        self, n, backend="marginal", particles=2000, metrics=None, seed=None
+    ) -> None:
+        """
+        We create the beliefs about the content of each cell, which can be kept as
+        independent probabilities per cell (marginal) or as a population of
+        sampled mazes (particles)
+
+        Args:
+            n (int): the size of the maze
+            backend (str, optional): marginal or particles. Defaults to "marginal".
+            particles (int, optional): number of particles of the particles backend.
+                Defaults to 2000.
+            metrics (Metrics, optional): where the updated cells are counted.
+                Defaults to None.
+            seed (int, optional): seed of the particles backend. Defaults to None.
+
+        Raises:
+            ValueError: if the backend is not known
+        """
+        if backend == "marginal":
+            self.beliefs = MarginalBelief(n)
+        elif backend == "particles":
+            self.beliefs = ParticleBelief(n, particles, seed)
+        else:
+            raise ValueError(f"Unknown belief backend: {backend}")
+        self.n = n
+        self.metrics = metrics or DISABLED
+
+    @property
+    def probability_matrix(self):
+        """
+        Read-only (n, n, 5) view of the probability of each element in each cell
+
+        Returns:
+            np.ndarray: the probability matrix
+        """
+        return self.beliefs.probability_matrix
+
+    def process_percepts(self, percept_0, position):
+        """
+        For each cell and for each cause we update the probabilities
+        based on the percepts we have received
+
+        Args:
+            percept_0 (list): list of 1s and 0s with the percepts
+            position (list): the player's position
         """
-        sum = 0
-        for x, y in adjacents:
-            sum += self.probability_matrix[x][y][ind]
-        return sum
+        touched = self.beliefs.update(percept_0[:5], position)
+        self.metrics.count("cells_touched", touched)
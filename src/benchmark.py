@@ -0,0 +1,329 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import numpy as np
+from agents import Logic, LogicalAgent, BayesianAgent
+from cells import CellSet
+from corpus import generate_layouts
+from engine import LogicalEngine, BayesianEngine, run_episode
+from search_algorithms import SearchAlgorithms
+
+"""
+Benchmarks of the agents, the search and the generation of the mazes across maze
+sizes. Every benchmark has a setup, which is not timed, that returns the operation
+to time
+"""
+
+
+def setup_initial_conditions(n, seed):
+    """
+    Prepares the compilation of the initial KB of the logical agent
+
+    Args:
+        n (int): size of the maze
+        seed (int): seed of the repetition
+
+    Returns:
+        function: the operation to time
+    """
+    agent = LogicalAgent(n)
+
+    def operation():
+        agent.logic = Logic(agent.encoding)
+        agent.add_initial_conditions()
+
+    return operation
+
+
+def setup_process_percept(n, seed):
+    """
+    Prepares the first percept of a logical agent in a random maze
+
+    Args:
+        n (int): size of the maze
+        seed (int): seed of the repetition
+
+    Returns:
+        function: the operation to time
+    """
+    engine = LogicalEngine(n)
+    percept, _ = engine.reset(seed)
+    agent = LogicalAgent(n)
+    visited = CellSet(n, [[0, 0]])
+    return lambda: agent.process_percept(percept, [0, 0], visited, False, False)
+
+
+def setup_process_percepts(n, seed):
+    """
+    Prepares the update of a Bayesian agent with a random percept in a random cell
+
+    Args:
+        n (int): size of the maze
+        seed (int): seed of the repetition
+
+    Returns:
+        function: the operation to time
+    """
+    rng = random.Random(seed)
+    agent = BayesianAgent(n)
+    percept = [rng.randint(0, 1) for _ in range(5)] + [0] * 6
+    position = [rng.randrange(n), rng.randrange(n)]
+    return lambda: agent.process_percepts(percept, position)
+
+
+def setup_a_star(n, seed):
+    """
+    Prepares a path between opposite corners of a maze where a tenth of the
+    cells have not been visited
+
+    Args:
+        n (int): size of the maze
+        seed (int): seed of the repetition
+
+    Returns:
+        function: the operation to time
+    """
+    rng = random.Random(seed)
+    corners = [(0, 0), (n - 1, n - 1)]
+    visited = CellSet(n)
+    for cell in np.ndindex(n, n):
+        if cell in corners or rng.random() > 0.1:
+            visited.add(cell)
+    return lambda: SearchAlgorithms(n).a_star_on_known(*corners, visited)
+
+
+def setup_initial_state(engine_class):
+    """
+    Prepares the generation of random layouts of a maze
+
+    Args:
+        engine_class (type): engine of the maze
+
+    Returns:
+        function: the setup
+    """
+
+    def setup(n, seed):
+        engine = engine_class(n)
+        engine.random = random.Random(seed)
+        return engine.generate_initial_state
+
+    return setup
+
+
+def setup_bulk_layouts(maze):
+    """
+    Prepares the generation of a batch of layouts with NumPy, to compare with the
+    generation of a single layout by the engine
+
+    Args:
+        maze (str): L (logical) or B (Bayesian)
+
+    Returns:
+        function: the setup
+    """
+
+    def setup(n, seed):
+        return lambda: generate_layouts(maze, n, BULK_LAYOUTS, seed)
+
+    return setup
+
+
+def setup_episode(engine_class):
+    """
+    Prepares whole games played by the search algorithm
+
+    Args:
+        engine_class (type): engine of the maze
+
+    Returns:
+        function: the setup
+    """
+
+    def setup(n, seed):
+        engine = engine_class(n)
+        return lambda: run_episode(engine, seed, max_steps=4 * n * n)
+
+    return setup
+
+
+LOGICAL_SIZES = [4, 6, 8, 12, 16, 24, 32]
+BAYESIAN_SIZES = [4, 8, 16, 32, 64, 128, 256]
+BULK_LAYOUTS = 10_000
+
+# Name, setup and sizes of every benchmark
+BENCHMARKS = [
+    ("add_initial_conditions", setup_initial_conditions, LOGICAL_SIZES),
+    ("process_percept", setup_process_percept, LOGICAL_SIZES),
+    ("process_percepts", setup_process_percepts, BAYESIAN_SIZES),
+    ("a_star_on_known", setup_a_star, BAYESIAN_SIZES),
+    ("logical_initial_state", setup_initial_state(LogicalEngine), BAYESIAN_SIZES),
+    ("bayesian_initial_state", setup_initial_state(BayesianEngine), BAYESIAN_SIZES),
+    ("logical_bulk_layouts", setup_bulk_layouts("L"), BAYESIAN_SIZES),
+    ("bayesian_bulk_layouts", setup_bulk_layouts("B"), BAYESIAN_SIZES),
+    ("logical_episode", setup_episode(LogicalEngine), LOGICAL_SIZES),
+    ("bayesian_episode", setup_episode(BayesianEngine), BAYESIAN_SIZES[:5]),
+]
+
+
+def measure(setup, n, repeat):
+    """
+    Times an operation several times, each with its own setup, and measures its
+    peak memory in one more run. The first run warms the caches up and is not counted
+
+    Args:
+        setup (function): the setup of the benchmark
+        n (int): size of the maze
+        repeat (int): number of timed runs
+
+    Returns:
+        float, int: median time in seconds and peak memory in bytes
+    """
+    times = []
+    for seed in range(repeat + 1):
+        operation = setup(n, seed)
+        start = time.perf_counter()
+        operation()
+        times.append(time.perf_counter() - start)
+    operation = setup(n, repeat + 1)
+    tracemalloc.start()
+    operation()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return float(np.median(times[1:])), peak
+
+
+def scaling_exponent(sizes, medians):
+    """
+    Fits time = c * n ** k in log-log space
+
+    Args:
+        sizes (list): sizes of the maze
+        medians (list): median times
+
+    Returns:
+        float: the exponent k, or None if there are not enough points
+    """
+    points = [(n, t) for n, t in zip(sizes, medians) if t > 0]
+    if len(points) < 2:
+        return None
+    sizes, medians = zip(*points)
+    return float(np.polyfit(np.log(sizes), np.log(medians), 1)[0])
+
+
+def run_benchmarks(names=None, repeat=5, max_size=None):
+    """
+    Runs the benchmarks
+
+    Args:
+        names (list, optional): benchmarks to run. Defaults to None, all of them.
+        repeat (int, optional): timed runs per size. Defaults to 5.
+        max_size (int, optional): largest size to run. Defaults to None.
+
+    Returns:
+        dict: environment of the run and the results of every benchmark
+    """
+    results = {}
+    for name, setup, sizes in BENCHMARKS:
+        if names and name not in names:
+            continue
+        sizes = [n for n in sizes if max_size is None or n <= max_size]
+        medians = []
+        peaks = []
+        for n in sizes:
+            median, peak = measure(setup, n, repeat)
+            medians.append(median)
+            peaks.append(peak)
+            print(
+                f"{name} n={n}: {median * 1000:.3f} ms, peak {peak / 1024:.1f} KiB",
+                file=sys.stderr,
+            )
+        results[name] = {
+            "sizes": sizes,
+            "median": medians,
+            "peak_memory": peaks,
+            "exponent": scaling_exponent(sizes, medians),
+        }
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeat": repeat,
+        "benchmarks": results,
+    }
+
+
+def compare(results, baseline, tolerance=1.25):
+    """
+    Compares the results with a baseline, size by size
+
+    Args:
+        results (dict): results of run_benchmarks
+        baseline (dict): stored results of an earlier run
+        tolerance (float, optional): ratio of times above which a size is reported
+            as a regression. Defaults to 1.25.
+
+    Returns:
+        list: lines of the comparison, list: regressions as (name, size, ratio)
+    """
+    lines = []
+    regressions = []
+    for name, current in results["benchmarks"].items():
+        old = baseline["benchmarks"].get(name)
+        if old is None:
+            continue
+        old_medians = dict(zip(old["sizes"], old["median"]))
+        for n, median in zip(current["sizes"], current["median"]):
+            if n not in old_medians or old_medians[n] <= 0:
+                continue
+            ratio = median / old_medians[n]
+            lines.append(
+                f"{name} n={n}: {median * 1000:.3f} ms vs "
+                f"{old_medians[n] * 1000:.3f} ms (x{ratio:.2f})"
+            )
+            if ratio > tolerance:
+                regressions.append((name, n, ratio))
+    return lines, regressions
+
+
+def parse_args(argv=None):
+    """
+    Parses the command line
+
+    Args:
+        argv (list, optional): arguments. Defaults to None, the ones of the process.
+
+    Returns:
+        argparse.Namespace: the arguments
+    """
+    parser = argparse.ArgumentParser(description="Scaling benchmarks of the mazes")
+    parser.add_argument("--only", nargs="*", choices=[b[0] for b in BENCHMARKS])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-size", type=int, default=None)
+    parser.add_argument("--output", default=None, help="JSON file for the results")
+    parser.add_argument("--baseline", default=None, help="JSON file to compare with")
+    parser.add_argument("--tolerance", type=float, default=1.25)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = run_benchmarks(args.only, args.repeat, args.max_size)
+    for name, result in results["benchmarks"].items():
+        exponent = result["exponent"]
+        if exponent is not None:
+            print(f"{name}: time ~ n^{exponent:.2f}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            lines, regressions = compare(results, json.load(f), args.tolerance)
+        print("\n".join(lines))
+        for name, n, ratio in regressions:
+            print(f"Regression in {name} n={n}: x{ratio:.2f}")
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,134 @@
+from array import array
+
+
+class CellSet:
+    """
+    Set of cells of an n x n maze stored as a bitboard, one bit per cell packed in
+    a bytearray and indexed by row * n + col. Adding and checking a cell take
+    constant time and the memory only depends on the size of the maze.
+    The cells are iterated in the order in which they were added, which is kept
+    as an array of flat indices of 2 bytes (4 above 256 x 256 cells), because
+    the users of a growing set read the cells added since their last visit
+    """
+
+    def __init__(self, n, cells=()) -> None:
+        """
+        Class constructor
+
+        Args:
+            n (int): size of the maze
+            cells (iterable, optional): initial cells. Defaults to ().
+        """
+        self.n = n
+        self.bits = bytearray((n * n + 7) // 8)
+        self.order = array("H" if n * n <= 1 << 16 else "I")
+        self.update(cells)
+
+    def __contains__(self, cell):
+        x, y = cell
+        if not (0 <= x < self.n and 0 <= y < self.n):
+            return False
+        index = x * self.n + y
+        return bool(self.bits[index >> 3] & (1 << (index & 7)))
+
+    def __iter__(self):
+        n = self.n
+        return (divmod(index, n) for index in self.order)
+
+    def __len__(self):
+        return len(self.order)
+
+    def __or__(self, other):
+        union = self.copy()
+        union.update(other)
+        return union
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __repr__(self) -> str:
+        return f"CellSet({self.n}, {list(self)})"
+
+    def add(self, cell):
+        """
+        Adds a cell to the set
+
+        Args:
+            cell (list): the cell, as a [row, col] list or tuple
+
+        Returns:
+            bool: whether the cell was not in the set
+        """
+        x, y = cell
+        return self.add_index(x * self.n + y)
+
+    def add_index(self, index):
+        """
+        Adds a cell given by its flat index
+
+        Args:
+            index (int): row * n + col
+
+        Returns:
+            bool: whether the cell was not in the set
+        """
+        mask = 1 << (index & 7)
+        if self.bits[index >> 3] & mask:
+            return False
+        self.bits[index >> 3] |= mask
+        self.order.append(index)
+        return True
+
+    def update(self, cells):
+        """
+        Adds several cells to the set. The union with another CellSet is computed
+        on the whole bitboard at once, and only the new cells are visited
+
+        Args:
+            cells (iterable): the cells
+        """
+        if isinstance(cells, CellSet) and cells.n == self.n:
+            new = cells.bitboard() & ~self.bitboard()
+            while new:
+                low = new & -new
+                self.add_index(low.bit_length() - 1)
+                new ^= low
+        else:
+            for cell in cells:
+                self.add(cell)
+
+    def copy(self):
+        """
+        Returns a copy of the set
+
+        Returns:
+            CellSet: the copy
+        """
+        other = CellSet(self.n)
+        other.bits[:] = self.bits
+        other.order = self.order[:]
+        return other
+
+    def bitboard(self):
+        """
+        Returns the set as an integer whose bit row * n + col is set for every cell
+
+        Returns:
+            int: the bitboard
+        """
+        return int.from_bytes(self.bits, "little")
+
+    def added_since(self, start):
+        """
+        Returns the cells added after the first ones, so that users of a set that
+        only grows can keep up with it incrementally
+
+        Args:
+            start (int): number of cells already seen
+
+        Returns:
+            list: the cells added since then, as (row, col) tuples
+        """
+        n = self.n
+        return [divmod(index, n) for index in self.order[start:]]
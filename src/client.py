@@ -0,0 +1,208 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+import numpy as np
+from server import DEFAULT_PORT
+
+"""
+Local test client of the game server. It opens many sessions at once, each one
+playing games with the search algorithm of the server, and reports the round trip
+latency of the requests of every session
+"""
+
+
+class MazeClient:
+    """
+    Connection to the game server, holding one game session
+    """
+
+    def __init__(self, reader, writer) -> None:
+        """
+        Class constructor, use connect instead
+
+        Args:
+            reader (asyncio.StreamReader): the responses
+            writer (asyncio.StreamWriter): the requests
+        """
+        self.reader = reader
+        self.writer = writer
+        self.latencies = []
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=DEFAULT_PORT, path=None):
+        """
+        Connects to the server
+
+        Args:
+            host (str, optional): address of the server. Defaults to "127.0.0.1".
+            port (int, optional): port of the server. Defaults to DEFAULT_PORT.
+            path (str, optional): path of a Unix socket, used instead of TCP.
+                Defaults to None.
+
+        Returns:
+            MazeClient: the client
+        """
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, op, **params):
+        """
+        Sends a request and waits for its response
+
+        Args:
+            op (str): the operation
+            **params: the rest of the request
+
+        Raises:
+            ConnectionError: if the server closes the connection
+            RuntimeError: if the server reports an error
+
+        Returns:
+            dict: the response
+        """
+        start = time.perf_counter()
+        self.writer.write(json.dumps({"op": op, **params}).encode() + b"\n")
+        await self.writer.drain()
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("The server closed the connection")
+        self.latencies.append(time.perf_counter() - start)
+        response = json.loads(line)
+        if not response["ok"]:
+            raise RuntimeError(response["error"])
+        return response
+
+    async def close(self):
+        """
+        Ends the session and closes the connection
+        """
+        try:
+            await self.request("close")
+        finally:
+            self.writer.close()
+            await self.writer.wait_closed()
+
+
+def latency_summary(latencies):
+    """
+    Percentiles of the latencies of a session
+
+    Args:
+        latencies (list): latencies in seconds
+
+    Returns:
+        dict: median, 99th percentile and maximum in milliseconds
+    """
+    if not latencies:
+        return {}
+    values = np.array(latencies) * 1000
+    return {
+        "p50_ms": float(np.percentile(values, 50)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max()),
+    }
+
+
+async def play_session(ind, args):
+    """
+    Plays the games of a session with the search algorithm of the server
+
+    Args:
+        ind (int): index of the session
+        args (argparse.Namespace): parsed command line arguments
+
+    Returns:
+        dict: results of the games and latency of the session
+    """
+    client = await MazeClient.connect(args.host, args.port, args.unix)
+    results = []
+    steps = 0
+    try:
+        for game in range(args.games):
+            response = await client.request(
+                "new",
+                maze=args.maze,
+                size=args.size,
+                seed=args.seed + ind * args.games + game,
+            )
+            while not response.get("done"):
+                if args.max_steps is not None and (
+                    response["info"]["steps"] >= args.max_steps
+                ):
+                    break
+                response = await client.request("auto")
+                steps += 1
+            results.append(response["info"]["result"] or "unfinished")
+        stats = await client.request("stats")
+    finally:
+        await client.close()
+    timings = stats["metrics"]["timings"]
+    return {
+        "session": ind,
+        "results": results,
+        "steps": steps,
+        "requests": len(client.latencies),
+        **latency_summary(client.latencies),
+        **{
+            f"{name}_ms": timings[name]["mean"] * 1000
+            for name in ["latency", "compute"]
+            if name in timings
+        },
+    }
+
+
+async def run_clients(args):
+    """
+    Runs every session at once
+
+    Args:
+        args (argparse.Namespace): parsed command line arguments
+
+    Returns:
+        list: the report of each session
+    """
+    return await asyncio.gather(
+        *[play_session(ind, args) for ind in range(args.sessions)]
+    )
+
+
+def parse_args(argv=None):
+    """
+    Parses the command line
+
+    Args:
+        argv (list, optional): arguments. Defaults to None, the ones of the process.
+
+    Returns:
+        argparse.Namespace: the arguments
+    """
+    parser = argparse.ArgumentParser(description="Play many sessions on a server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", default=None, help="path of a Unix socket")
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--games", type=int, default=1, help="games per session")
+    parser.add_argument("--maze", choices=["L", "B"], default="L")
+    parser.add_argument("--size", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-steps", type=int, default=None)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    start = time.perf_counter()
+    reports = asyncio.run(run_clients(args))
+    for report in reports:
+        print(json.dumps(report))
+    latencies = [report["p50_ms"] for report in reports if "p50_ms" in report]
+    print(
+        f"{len(reports)} sessions in {time.perf_counter() - start:.2f} s, "
+        f"median latency {np.median(latencies):.2f} ms",
+        file=sys.stderr,
+    )
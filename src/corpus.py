@@ -0,0 +1,188 @@
+import argparse
+import json
+import numpy as np
+
+"""
+Bulk generation of maze layouts. The layouts are sampled with NumPy for many mazes
+at once and written to a memory-mapped .npy file with one row per episode, holding
+the flat cell (row * n + col) of each element in the order of the engine's elements.
+A JSON file next to it records the maze and its size
+"""
+
+CHUNK = 1_000_000
+
+
+def resample(rng, cells, bad, low, high):
+    """
+    Draws again the cells marked as bad until none is. After the first pass only
+    the rows that were drawn again are checked
+
+    Args:
+        rng (np.random.Generator): random generator
+        cells (np.ndarray): (count, k) array of cells, modified in place
+        bad (function): given some rows of cells and their indices, returns the
+            mask of their bad cells
+        low (int): lowest cell
+        high (int): highest cell plus one
+    """
+    rows = np.arange(len(cells))
+    while len(rows):
+        mask = bad(cells[rows], rows)
+        wrong = mask.any(axis=1)
+        rows, mask = rows[wrong], mask[wrong]
+        block = cells[rows]
+        block[mask] = rng.integers(low, high, size=int(mask.sum()))
+        cells[rows] = block
+
+
+def logical_layouts(rng, n, count):
+    """
+    Samples layouts of the logical maze: 6 different cells, none of them the start
+
+    Args:
+        rng (np.random.Generator): random generator
+        n (int): size of the maze
+        count (int): number of layouts
+
+    Returns:
+        np.ndarray: (count, 6) array of cells
+    """
+    cells = rng.integers(1, n * n, size=(count, 6))
+
+    def repeated(cells, rows):
+        ordered = np.sort(cells, axis=1)
+        repeats = (ordered[:, 1:] == ordered[:, :-1]).any(axis=1)
+        return np.repeat(repeats[:, None], cells.shape[1], axis=1)
+
+    resample(rng, cells, repeated, 1, n * n)
+    return cells
+
+
+def bayesian_layouts(rng, n, count):
+    """
+    Samples layouts of the Bayesian maze. The traps can share a cell, as can CK,
+    M and S, but they cannot mix, and the start remains free
+
+    Args:
+        rng (np.random.Generator): random generator
+        n (int): size of the maze
+        count (int): number of layouts
+
+    Returns:
+        np.ndarray: (count, 6) array of cells
+    """
+    traps = rng.integers(1, n * n, size=(count, 3))
+    others = rng.integers(1, n * n, size=(count, 3))
+
+    def on_trap(others, rows):
+        return (others[:, :, None] == traps[rows, None, :]).any(axis=2)
+
+    resample(rng, others, on_trap, 1, n * n)
+    return np.concatenate([traps, others], axis=1)
+
+
+GENERATORS = {"L": logical_layouts, "B": bayesian_layouts}
+
+
+def generate_layouts(maze, n, count, seed=None):
+    """
+    Samples layouts of a maze
+
+    Args:
+        maze (str): L (logical) or B (Bayesian)
+        n (int): size of the maze
+        count (int): number of layouts
+        seed (int, optional): seed of the generator. Defaults to None.
+
+    Raises:
+        ValueError: if the maze is too small for every element
+
+    Returns:
+        np.ndarray: (count, 6) array of cells
+    """
+    if n * n - 1 < 6:
+        raise ValueError(f"A {n}x{n} maze has no room for 6 elements")
+    return GENERATORS[maze](np.random.default_rng(seed), n, count)
+
+
+def write_corpus(fn, maze, n, count, seed=None, chunk=CHUNK):
+    """
+    Writes the layouts of many episodes to a memory-mapped file, a chunk at a time
+
+    Args:
+        fn (str): the .npy file
+        maze (str): L (logical) or B (Bayesian)
+        n (int): size of the maze
+        count (int): number of episodes
+        seed (int, optional): seed of the generator. Defaults to None.
+        chunk (int, optional): layouts generated at once. Defaults to CHUNK.
+    """
+    rng = np.random.default_rng(seed)
+    layouts = np.lib.format.open_memmap(
+        fn, mode="w+", dtype=np.uint32, shape=(count, 6)
+    )
+    for start in range(0, count, chunk):
+        stop = min(start + chunk, count)
+        layouts[start:stop] = GENERATORS[maze](rng, n, stop - start)
+    layouts.flush()
+    del layouts
+    with open(fn + ".json", "w") as f:
+        json.dump({"maze": maze, "size": n, "count": count, "seed": seed}, f)
+
+
+class Corpus:
+    """
+    Layouts of a corpus file, indexed by episode id and mapped from disk
+    """
+
+    def __init__(self, fn) -> None:
+        """
+        Class constructor
+
+        Args:
+            fn (str): the .npy file
+        """
+        with open(fn + ".json") as f:
+            meta = json.load(f)
+        self.maze = meta["maze"]
+        self.size = meta["size"]
+        self.layouts = np.load(fn, mmap_mode="r")
+
+    def __len__(self):
+        return len(self.layouts)
+
+    def __getitem__(self, episode):
+        """
+        Layout of an episode
+
+        Args:
+            episode (int): episode id
+
+        Returns:
+            list: cell of each element
+        """
+        return self.layouts[episode].tolist()
+
+
+def parse_args(argv=None):
+    """
+    Parses the command line
+
+    Args:
+        argv (list, optional): arguments. Defaults to None, the ones of the process.
+
+    Returns:
+        argparse.Namespace: the arguments
+    """
+    parser = argparse.ArgumentParser(description="Generate a corpus of maze layouts")
+    parser.add_argument("output", help=".npy file")
+    parser.add_argument("--maze", choices=["L", "B"], default="L")
+    parser.add_argument("--size", type=int, default=6)
+    parser.add_argument("--count", type=int, default=CHUNK)
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    write_corpus(args.output, args.maze, args.size, args.count, args.seed)
@@ -0,0 +1,950 @@
+import array
+import random
+from cells import CellSet
+from agents import LogicalAgent, BayesianAgent
+from search_algorithms import LogicalSearch, BayesianSearch, Frontier
+from metrics import DISABLED
+
+"""
+Headless engines of the mazes. They hold the state of a game and apply its rules
+step by step, without printing, asking for input or waiting, so that games can be
+played by programs, benchmarked and run at scale
+"""
+
+DEATHS = {"precipice", "monster", "fire", "spike", "dart"}
+
+# Flags of the elements in a cell of the grid
+FIRE = 1
+SPIKE = 2
+DART = 4
+PRECIPICE = 8
+MONSTER = 16
+KURTZ = 32
+EXIT = 64
+PLAYER = 128
+# Letters of each flag when a cell is shown, in the order they are merged
+LETTERS = [
+    (FIRE, "F"),
+    (SPIKE, "P"),
+    (DART, "D"),
+    (PRECIPICE, "P"),
+    (MONSTER, "M"),
+    (KURTZ, "CK"),
+    (EXIT, "S"),
+]
+
+
+class BaseEngine:
+    """
+    Class with the common rules of both mazes
+    """
+
+    actions = ["UP", "DOWN", "LEFT", "RIGHT", "EXIT"]
+    moves = {"UP": (-1, 0), "DOWN": (1, 0), "LEFT": (0, -1), "RIGHT": (0, 1)}
+    # Position of the wall of each move in the percept
+    walls = {}
+    # Flag of each element placed in the maze, in the order of the layouts
+    elements = []
+    # Flag of each element that is perceived and its position in the percept
+    stimuli = []
+    # Whether the elements of the player's own cell are perceived
+    senses_own_cell = False
+    # Positions of the percept, the last two being the scream and Kurtz
+    percept_size = 0
+    search_class = None
+
+    def __init__(self, n, metrics=None, infer=True, log=None) -> None:
+        """
+        Class constructor. The engine has no game until reset is called
+
+        Args:
+            n (int): size of the maze
+            metrics (Metrics, optional): metrics of the run, shared with the agent and
+                the search. Defaults to None.
+            infer (bool, optional): whether the agent processes the percepts. Replays
+                only need the rules of the game. Defaults to True.
+            log (ReplayWriter, optional): where the games are recorded. Defaults to None.
+        """
+        self.size = n
+        self.metrics = metrics or DISABLED
+        self.infer = infer
+        self.log = log
+        self.random = random.Random()
+        self.layout = None
+        self.player = PLAYER
+        self.grid = None
+        self.percept_map = None
+        self.perceived = 0
+        for flag, _ in self.stimuli:
+            self.perceived |= flag
+        self.playing = False
+        self.steps = 0
+        self.result = None
+        self.events = []
+
+    def reset(self, seed=None, layout=None):
+        """
+        Starts a new game, with the given layout or a random one
+
+        Args:
+            seed (int, optional): seed of everything random in the game, so that a seed
+                always plays the same game. Defaults to None.
+            layout (list, optional): flat index (row * n + col) of the cell of each
+                element, in the order of elements. Defaults to None, a random layout.
+
+        Raises:
+            ValueError: if the layout breaks the rules of the maze
+
+        Returns:
+            list, dict: the first percept and the info of the game
+        """
+        self.random = random.Random(seed)
+        if layout is None:
+            layout = self.generate_layout()
+        else:
+            layout = [int(cell) for cell in layout]
+            self.check_layout(layout)
+        self.layout = layout
+        self.player = PLAYER
+        self.kurt_found = False
+        self.safe_cells = CellSet(self.size)
+        self.pos = [0, 0]
+        self.visited = CellSet(self.size, [self.pos])
+        self.viewed = CellSet(self.size, [self.pos])
+        self.at_exit = False
+        self.at_monster = False
+        self.monster_dead = False
+        self.scream = False
+        self.steps = 0
+        self.result = None
+        self.events = []
+        self.grid = self.build_state(layout)
+        self.percept_map = self.build_percept_map()
+        self.new_game()
+        self.playing = True
+        self.percept = self.generate_percept()
+        if self.log is not None:
+            self.log.start(self)
+        return self.percept, self.info()
+
+    def generate_layout(self):
+        """
+        Places the elements in random cells following the rules of the maze
+
+        Returns:
+            list: flat index of the cell of each element
+        """
+        raise NotImplementedError
+
+    def check_room(self):
+        """
+        Checks that there are enough cells off the start for every element to
+        have its own, so that a random layout can always be placed
+
+        Raises:
+            ValueError: if there are not
+        """
+        if self.size * self.size - 1 < len(self.elements):
+            raise ValueError(
+                f"A {self.size}x{self.size} maze has no room for "
+                f"{len(self.elements)} elements"
+            )
+
+    def check_layout(self, layout):
+        """
+        Checks that a layout has a cell for every element and that the start is free
+
+        Args:
+            layout (list): flat index of the cell of each element
+
+        Raises:
+            ValueError: if it does not
+        """
+        if len(layout) != len(self.elements):
+            raise ValueError(f"A layout needs {len(self.elements)} cells")
+        if any(not 0 < cell < self.size * self.size for cell in layout):
+            raise ValueError("The elements must be inside the maze and off the start")
+
+    def build_state(self, layout):
+        """
+        Builds the grid of the maze from a layout. Each cell of the grid, at the flat
+        index row * n + col, holds the flags of its elements
+
+        Args:
+            layout (list): flat index of the cell of each element
+
+        Returns:
+            bytearray: the grid
+        """
+        grid = bytearray(self.size * self.size)
+        grid[0] = self.player
+        for flag, cell in zip(self.elements, layout):
+            grid[cell] |= flag
+        return grid
+
+    def generate_initial_state(self):
+        """
+        Generates a random initial state of the maze
+
+        Returns:
+            bytearray: the grid of the maze
+        """
+        return self.build_state(self.generate_layout())
+
+    def cell_text(self, x, y):
+        """
+        Text of a cell when the maze is shown. The player hides the rest of the cell
+
+        Args:
+            x (int): row
+            y (int): column
+
+        Returns:
+            str: 4 characters, the letters of the elements in the cell
+        """
+        cell = self.grid[x * self.size + y]
+        if cell & PLAYER:
+            text = "CWCK" if cell & KURTZ else "CW"
+        else:
+            text = "".join(letter for flag, letter in LETTERS if cell & flag)
+        return text.ljust(4)
+
+    def adjacent_cells(self, cell):
+        """
+        Flat indices of the cells adjacent to a cell
+
+        Args:
+            cell (int): flat index of the cell
+
+        Returns:
+            list: the adjacent cells
+        """
+        n = self.size
+        x, y = divmod(cell, n)
+        adjacent = []
+        if y > 0:
+            adjacent.append(cell - 1)
+        if y < n - 1:
+            adjacent.append(cell + 1)
+        if x > 0:
+            adjacent.append(cell - n)
+        if x < n - 1:
+            adjacent.append(cell + n)
+        return adjacent
+
+    def neighbourhood(self, cell):
+        """
+        Flags of the cells adjacent to a cell
+
+        Args:
+            cell (int): flat index of the cell
+
+        Returns:
+            int: the flags of every adjacent cell
+        """
+        around = 0
+        for other in self.adjacent_cells(cell):
+            around |= self.grid[other]
+        return around
+
+    def sense(self, flags):
+        """
+        Positions of the percept of the elements among some flags
+
+        Args:
+            flags (int): the flags
+
+        Returns:
+            list: the positions
+        """
+        return [ind for flag, ind in self.stimuli if flags & flag]
+
+    def cell_percept(self, cell):
+        """
+        Percept of a cell as a bitmask, without the scream and Kurtz: the walls
+        around it and the elements perceived from it
+
+        Args:
+            cell (int): flat index of the cell
+
+        Returns:
+            int: the bitmask, one bit per position of the percept
+        """
+        n = self.size
+        x, y = divmod(cell, n)
+        mask = 0
+        if y == 0:
+            mask |= 1 << self.walls["LEFT"]
+        elif y == n - 1:
+            mask |= 1 << self.walls["RIGHT"]
+        if x == 0:
+            mask |= 1 << self.walls["UP"]
+        elif x == n - 1:
+            mask |= 1 << self.walls["DOWN"]
+        flags = self.neighbourhood(cell)
+        if self.senses_own_cell:
+            flags |= self.grid[cell]
+        for ind in self.sense(flags):
+            mask |= 1 << ind
+        return mask
+
+    def build_percept_map(self):
+        """
+        Precomputes the percept of every cell. The elements do not move, so the map
+        only changes when the elements of a cell do, through set_flags
+
+        Returns:
+            array.array: the bitmask of every cell, by flat index
+        """
+        return array.array(
+            "H", [self.cell_percept(cell) for cell in range(self.size * self.size)]
+        )
+
+    def set_flags(self, cell, add=0, remove=0):
+        """
+        Changes the elements of a cell. If a perceived element changes, the percepts
+        of the cells it is perceived from are computed again
+
+        Args:
+            cell (int): flat index of the cell
+            add (int, optional): flags to set. Defaults to 0.
+            remove (int, optional): flags to clear. Defaults to 0.
+        """
+        before = self.grid[cell]
+        self.grid[cell] = (before | add) & ~remove
+        if not (before ^ self.grid[cell]) & self.perceived:
+            return
+        cells = self.adjacent_cells(cell)
+        if self.senses_own_cell:
+            cells.append(cell)
+        for other in cells:
+            self.percept_map[other] = self.cell_percept(other)
+
+    def read_percept(self):
+        """
+        Percept of the player's cell, read from the percept map
+
+        Returns:
+            list: list of 1s and 0s
+        """
+        mask = self.percept_map[self.pos[0] * self.size + self.pos[1]]
+        if self.scream:
+            mask |= 1 << (self.percept_size - 2)
+        if self.kurt_found:
+            mask |= 1 << (self.percept_size - 1)
+        return [(mask >> ind) & 1 for ind in range(self.percept_size)]
+
+    def hints(self):
+        """
+        Positions of the percept of the elements in the cells adjacent to the player,
+        which the mazes show as messages
+
+        Returns:
+            list: the positions
+        """
+        return self.sense(self.neighbourhood(self.pos[0] * self.size + self.pos[1]))
+
+    def new_game(self):
+        """
+        Resets the items and the agent of a new game
+        """
+        raise NotImplementedError
+
+    def check_action(self, action, direction=None):
+        """
+        Checks that an action can be executed, before the state of the game changes
+
+        Args:
+            action (str): the action
+            direction (str, optional): direction of the weapon. Defaults to None.
+
+        Raises:
+            ValueError: if the action or the direction are not valid
+        """
+        if action not in self.actions:
+            raise ValueError(f"Unknown action: {action}")
+        if direction is not None and direction not in self.moves:
+            raise ValueError(f"Unknown direction: {direction}")
+
+    def step(self, action, direction=None):
+        """
+        Executes an action
+
+        Args:
+            action (str): the action
+            direction (str, optional): direction of the weapon, if it needs one.
+                Defaults to None.
+
+        Raises:
+            RuntimeError: if there is no game being played
+            ValueError: if the action or the direction are not valid, in which
+                case the state of the game does not change
+
+        Returns:
+            list, int, bool, dict: the percept, the reward (1 for escaping with Kurtz,
+                -1 for dying and 0 otherwise), whether the game has finished and its info
+        """
+        if not self.playing:
+            raise RuntimeError("There is no game being played, call reset first")
+        self.check_action(action, direction)
+        self.events = []
+        self.steps += 1
+        pos_before = self.pos.copy()
+        if action in self.moves:
+            if self.percept[self.walls[action]] != 1:
+                dx, dy = self.moves[action]
+                self.pos[0] += dx
+                self.pos[1] += dy
+            else:
+                self.events.append(
+                    f"You can't move {action.lower()}, there's a wall"
+                )
+        elif action == "EXIT":
+            if self.at_exit:
+                if self.kurt_found:
+                    self.events.append("Congratulations, you have escaped the maze")
+                    self.result = "win"
+                else:
+                    self.events.append("You escape the maze, but leave Kurt behind")
+                    self.result = "escaped"
+                self.playing = False
+            else:
+                self.events.append("You are not at the exit")
+        else:
+            self.use_weapon(direction)
+        if pos_before != self.pos:
+            self.leave_cell(pos_before)
+            self.check_after_move()
+            self.set_flags(self.pos[0] * self.size + self.pos[1], add=self.player)
+        if self.log is not None:
+            self.log.step(action, direction, self.percept)
+        return self.percept, self.reward(), not self.playing, self.info()
+
+    def reward(self):
+        """
+        Reward of the last step
+
+        Returns:
+            int: 1 for escaping with Kurtz, -1 for dying and 0 otherwise
+        """
+        if self.result == "win":
+            return 1
+        if self.result in DEATHS:
+            return -1
+        return 0
+
+    def info(self):
+        """
+        Information about the game
+
+        Returns:
+            dict: messages of the last step, result, steps, position and items found
+        """
+        return {
+            "events": self.events,
+            "result": self.result,
+            "steps": self.steps,
+            "position": self.pos.copy(),
+            "kurt_found": self.kurt_found,
+            "at_exit": self.at_exit,
+        }
+
+    def die(self, cause, message):
+        """
+        Ends the game with the death of the player
+
+        Args:
+            cause (str): what killed the player
+            message (str): message of the death
+        """
+        self.playing = False
+        self.result = cause
+        self.events.append(message)
+
+    def find_kurtz(self):
+        """
+        Picks Kurtz up
+        """
+        self.kurt_found = True
+        self.player = PLAYER | KURTZ
+
+    def sat_calls(self):
+        """
+        Number of calls to the SAT solver made by the agent in this game
+
+        Returns:
+            int: the number of calls
+        """
+        return 0
+
+    def new_search(self):
+        """
+        Creates the search that plays the maze automatically
+
+        Returns:
+            SearchAlgorithms: the search
+        """
+        return self.search_class(self.size, self.metrics)
+
+    def sync_search(self, search):
+        """
+        Tells the search what the player has found
+
+        Args:
+            search (SearchAlgorithms): the search
+        """
+        search.kurt_found = self.kurt_found
+        if self.at_exit:
+            search.exit_pos = self.pos.copy()
+
+
+class LogicalEngine(BaseEngine):
+    """
+    Engine of the logical maze
+    """
+
+    actions = BaseEngine.actions + ["GRENADE"]
+    walls = {"UP": 3, "DOWN": 4, "LEFT": 5, "RIGHT": 6}
+    elements = [PRECIPICE, PRECIPICE, PRECIPICE, MONSTER, KURTZ, EXIT]
+    stimuli = [(PRECIPICE, 0), (MONSTER, 1), (EXIT, 2)]
+    percept_size = 9
+    search_class = LogicalSearch
+
+    def new_game(self):
+        """
+        Gives the player a grenade and a new logical agent
+        """
+        self.grenade = True
+        self.agent = None
+        if self.infer:
+            self.agent = LogicalAgent(self.size, metrics=self.metrics)
+
+    def sat_calls(self):
+        """
+        Number of calls to the SAT solver made by the agent in this game
+
+        Returns:
+            int: the number of calls
+        """
+        return self.agent.logic.session.calls
+
+    def generate_layout(self):
+        """
+        Places every element in a different empty cell
+
+        Raises:
+            ValueError: if the maze is too small for every element
+
+        Returns:
+            list: flat index of the cell of each element
+        """
+        n = self.size
+        self.check_room()
+        layout = []
+        taken = {0}
+        for _ in self.elements:
+            x, y = [self.random.randint(0, n - 1) for _ in range(2)]
+            while x * n + y in taken:
+                x, y = [self.random.randint(0, n - 1) for _ in range(2)]
+            taken.add(x * n + y)
+            layout.append(x * n + y)
+        return layout
+
+    def check_layout(self, layout):
+        """
+        Checks that every element of a layout is in a different cell
+
+        Args:
+            layout (list): flat index of the cell of each element
+
+        Raises:
+            ValueError: if it is not
+        """
+        super().check_layout(layout)
+        if len(set(layout)) != len(layout):
+            raise ValueError("The elements of the logical maze cannot share a cell")
+
+    def generate_percept(self):
+        """
+        Generates a percept based on the player's position. This percept is processed
+        by the logical agent, which returns its predictions. These are verified and stored
+        according to their type
+
+        Returns:
+            list: list with percept information (order of slides plus Kurtz at the end)
+        """
+        start = self.metrics.clock()
+        base = self.read_percept()
+        self.metrics.record("percept", start)
+        if self.agent is None:
+            return base
+        start = self.metrics.clock()
+        safe_cells, monster, precipices, exit = self.agent.process_percept(
+            base, self.pos, self.visited, self.at_exit, self.at_monster
+        )
+        self.metrics.record("inference", start)
+        known = [safe_cells, monster, precipices, exit]
+        self.check_predictions(known)
+        self.safe_cells.update(safe_cells + exit)
+        self.viewed.update(safe_cells + monster + precipices + exit)
+        return base
+
+    def check_predictions(self, predictions):
+        """
+        Verification of the logical model's predictions
+
+        Args:
+            predictions (list): list with lists for each type of prediction
+        """
+        if self.playing:
+            expected = [0, MONSTER, PRECIPICE, EXIT]
+            for ind, category in enumerate(predictions):
+                for prediction in category:
+                    cell = self.grid[prediction[0] * self.size + prediction[1]]
+                    if cell != KURTZ and cell != expected[ind]:
+                        self.events.append(
+                            "The logical model made an incorrect prediction"
+                        )
+                        return
+
+    def use_weapon(self, direction=None):
+        """
+        Throws the grenade, which kills the monster if it is adjacent
+
+        Args:
+            direction (str, optional): unused, the grenade reaches every adjacent cell.
+                Defaults to None.
+        """
+        if self.grenade:
+            self.grenade = False
+            if self.percept[1] == 1:
+                self.scream = True
+                self.monster_dead = True
+        else:
+            self.events.append("You have no grenades left")
+
+    def leave_cell(self, pos_before):
+        """
+        Takes the player, and Kurtz if found, out of the cell it has left
+
+        Args:
+            pos_before (list): the cell
+        """
+        cell = pos_before[0] * self.size + pos_before[1]
+        self.set_flags(cell, remove=PLAYER | KURTZ)
+        self.at_exit = False
+        self.at_monster = False
+
+    def check_after_move(self):
+        """
+        Checks what should happen after the player's move
+        """
+        cell = self.grid[self.pos[0] * self.size + self.pos[1]]
+        if cell & PRECIPICE:
+            self.die("precipice", "You fell into a precipice. Mission failed")
+        elif cell & MONSTER:
+            if not self.monster_dead:
+                self.die("monster", "The monster ate you. Mission failed")
+            else:
+                self.at_monster = True
+                self.events.append("You see the monster's corpse")
+        elif cell & EXIT:
+            self.at_exit = True
+            self.events.append("You are at the exit")
+        elif cell & KURTZ:
+            self.find_kurtz()
+
+        self.visited.add(self.pos)
+        self.percept = self.generate_percept()
+
+    def auto_action(self, search):
+        """
+        Asks the search for the next action
+
+        Args:
+            search (LogicalSearch): the search
+
+        Returns:
+            str: the action
+        """
+        start = self.metrics.clock()
+        self.sync_search(search)
+        action = search.give_next_move(self.safe_cells, self.pos, self.visited)
+        self.metrics.record("planning", start)
+        return action
+
+
+class BayesianEngine(BaseEngine):
+    """
+    Engine of the Bayesian maze
+    """
+
+    actions = BaseEngine.actions + ["BLOWGUN"]
+    walls = {"UP": 5, "DOWN": 6, "LEFT": 7, "RIGHT": 8}
+    elements = [FIRE, SPIKE, DART, MONSTER, KURTZ, EXIT]
+    stimuli = [(FIRE, 0), (SPIKE, 1), (DART, 2), (MONSTER, 3), (EXIT, 4)]
+    senses_own_cell = True
+    percept_size = 11
+    # Traps in the order they are checked, with the cause and message of the death
+    traps = [
+        (FIRE, "fire", "You burned in the fire trap. Mission failed"),
+        (SPIKE, "spike", "You fell into the spike trap. Mission failed"),
+        (DART, "dart", "You fell into the dart trap. Mission failed"),
+    ]
+    search_class = BayesianSearch
+
+    def __init__(
+        self, n, backend="marginal", metrics=None, infer=True, log=None
+    ) -> None:
+        """
+        Class constructor
+
+        Args:
+            n (int): size of the maze
+            backend (str, optional): belief backend of the agent, marginal or particles.
+                Defaults to "marginal".
+            metrics (Metrics, optional): metrics of the run. Defaults to None.
+            infer (bool, optional): whether the agent processes the percepts.
+                Defaults to True.
+            log (ReplayWriter, optional): where the games are recorded. Defaults to None.
+        """
+        super().__init__(n, metrics, infer, log)
+        self.backend = backend
+
+    def new_game(self):
+        """
+        Gives the player a dart and a new Bayesian agent
+        """
+        self.dart = True
+        self.frontier = Frontier([(0, 1), (1, 0)])
+        self.agent = None
+        if self.infer:
+            self.agent = BayesianAgent(
+                self.size,
+                self.backend,
+                metrics=self.metrics,
+                seed=self.random.getrandbits(32),
+            )
+
+    def generate_layout(self):
+        """
+        Places the elements. Traps can share a cell, as can CK, M, and S, but
+        they cannot mix. The start remains free
+
+        Raises:
+            ValueError: if the maze is too small for every element
+
+        Returns:
+            list: flat index of the cell of each element
+        """
+        n = self.size
+        self.check_room()
+        traps = set()
+        layout = []
+        for _ in self.elements[:3]:
+            x, y = [self.random.randint(0, n - 1) for _ in range(2)]
+            while x * n + y == 0:
+                x, y = [self.random.randint(0, n - 1) for _ in range(2)]
+            traps.add(x * n + y)
+            layout.append(x * n + y)
+        for _ in self.elements[3:]:
+            x, y = [self.random.randint(0, n - 1) for _ in range(2)]
+            while x * n + y in traps or x * n + y == 0:
+                x, y = [self.random.randint(0, n - 1) for _ in range(2)]
+            layout.append(x * n + y)
+        return layout
+
+    def check_layout(self, layout):
+        """
+        Checks that no trap shares a cell with CK, M or S
+
+        Args:
+            layout (list): flat index of the cell of each element
+
+        Raises:
+            ValueError: if one does
+        """
+        super().check_layout(layout)
+        if set(layout[:3]) & set(layout[3:]):
+            raise ValueError("Traps cannot share a cell with CK, M or S")
+
+    def generate_percept(self):
+        """
+        Generates a percept based on the player's position. This percept is processed
+        by the Bayesian agent, which returns its prediction.
+
+        Returns:
+            list: list with percept information (order of slides plus Kurtz at the end)
+        """
+        start = self.metrics.clock()
+        base = self.read_percept()
+        self.metrics.record("percept", start)
+        if self.agent is not None:
+            start = self.metrics.clock()
+            self.agent.process_percepts(base, self.pos)
+            self.metrics.record("inference", start)
+
+        return base
+
+    def dart_target(self, direction):
+        """
+        Cell the dart would reach if it was blown in a direction
+
+        Args:
+            direction (str): UP, DOWN, LEFT or RIGHT
+
+        Raises:
+            ValueError: if the direction is not valid
+
+        Returns:
+            list: the cell, or None if the dart would hit a wall
+        """
+        if direction not in self.moves:
+            raise ValueError(f"Unknown direction: {direction}")
+        dx, dy = self.moves[direction]
+        a, b = self.pos[0] + dx, self.pos[1] + dy
+        if 0 <= a < self.size and 0 <= b < self.size:
+            return [a, b]
+        return None
+
+    def check_action(self, action, direction=None):
+        """
+        Checks that an action can be executed. Blowing a dart needs a direction
+
+        Args:
+            action (str): the action
+            direction (str, optional): direction of the dart. Defaults to None.
+
+        Raises:
+            ValueError: if the action or the direction are not valid
+        """
+        super().check_action(action, direction)
+        if action == "BLOWGUN" and self.dart and direction is None:
+            raise ValueError("The dart needs a direction")
+
+    def use_weapon(self, direction=None):
+        """
+        Blows the dart, which kills the monster if it is in the chosen direction.
+        If the dart would hit a wall, it is kept
+
+        Args:
+            direction (str, optional): UP, DOWN, LEFT or RIGHT. Defaults to None.
+
+        Raises:
+            ValueError: if the direction is not valid
+        """
+        if not self.dart:
+            self.events.append("You have no darts left")
+            return
+        target = self.dart_target(direction)
+        if target is None:
+            self.events.append("The dart hits the wall, choose another direction")
+            return
+        if self.grid[target[0] * self.size + target[1]] & MONSTER:
+            self.scream = True
+            self.monster_dead = True
+        self.dart = False
+
+    def leave_cell(self, pos_before):
+        """
+        Takes the player, and Kurtz if found, out of the cell it has left
+
+        Args:
+            pos_before (list): the cell
+        """
+        cell = pos_before[0] * self.size + pos_before[1]
+        self.set_flags(cell, remove=PLAYER | KURTZ)
+        self.at_exit = False
+        self.at_monster = False
+        if self.pos not in self.visited:
+            self.frontier.remove(tuple(self.pos))
+
+    def get_adjacent(self, row, col, visited):
+        """
+        Given a row and column, returns the adjacent cells that have not
+        been visited
+
+        Args:
+            row (int): row
+            col (int): column
+            visited (CellSet): already visited cells
+
+        Returns:
+            list: unvisited adjacent cells
+        """
+        adjacent = []
+        for x, y in [(row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)]:
+            if (
+                x in range(0, self.size)
+                and y in range(0, self.size)
+                and (x, y) not in visited
+            ):
+                adjacent.append((x, y))
+
+        return adjacent
+
+    def check_after_move(self):
+        """
+        Checks what should happen after the player's move
+        """
+        cell = self.grid[self.pos[0] * self.size + self.pos[1]]
+        for flag, cause, message in self.traps:
+            if cell & flag:
+                self.die(cause, message)
+        if cell & MONSTER:
+            if not self.monster_dead:
+                self.die("monster", "The monster ate you. Mission failed")
+            else:
+                self.at_monster = True
+                self.events.append("You see the monster's corpse")
+        if cell & KURTZ:
+            self.find_kurtz()
+        if cell & EXIT:
+            self.at_exit = True
+            self.events.append("You are at the exit")
+
+        self.visited.add(self.pos)
+        for i in self.get_adjacent(self.pos[0], self.pos[1], self.visited):
+            self.frontier.add(i)
+        self.percept = self.generate_percept()
+
+    def auto_action(self, search):
+        """
+        Asks the search for the next action
+
+        Args:
+            search (BayesianSearch): the search
+
+        Returns:
+            str: the action
+        """
+        start = self.metrics.clock()
+        self.sync_search(search)
+        action = search.give_next_move(
+            self.agent.probability_matrix,
+            self.pos,
+            self.visited,
+        )
+        self.metrics.record("planning", start)
+        return action
+
+
+def run_episode(engine, seed=None, max_steps=None, layout=None):
+    """
+    Plays a whole game with the search of the engine
+
+    Args:
+        engine (BaseEngine): the engine
+        seed (int, optional): seed of the random layout. Defaults to None.
+        max_steps (int, optional): steps after which the game is stopped. Defaults to None.
+        layout (list, optional): cell of each element, instead of a random layout.
+            Defaults to None.
+
+    Returns:
+        dict: the info of the last step
+    """
+    search = engine.new_search()
+    _, info = engine.reset(seed, layout)
+    while engine.playing and (max_steps is None or engine.steps < max_steps):
+        _, _, _, info = engine.step(engine.auto_action(search))
+    return info
@@ -1,6 +1,139 @@
-from labyrinth import LogicalMaze, BayesianMaze
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from corpus import Corpus
+from engine import LogicalEngine, BayesianEngine, run_episode
+from metrics import Metrics
+from replay import ReplayWriter
+
+ENGINES = {"L": LogicalEngine, "B": BayesianEngine}
+
+
+def play_episode(
+    maze, size, seed, max_steps=None, metrics=False, replay_dir=None, layout=None
+):
+    """
+    Plays a seeded game with the search algorithm, without any output
+
+    Args:
+        maze (str): L (logical) or B (Bayesian)
+        size (int): size of the maze
+        seed (int): seed of the layout
+        max_steps (int, optional): steps after which the game is stopped. Defaults to None.
+        metrics (bool, optional): whether to record the metrics of the game.
+            Defaults to False.
+        replay_dir (str, optional): directory where the game is recorded. Defaults
+            to None.
+        layout (list, optional): cell of each element, instead of the one drawn
+            from the seed. Defaults to None.
+
+    Returns:
+        dict: seed, result, cause of the death, steps, SAT calls, wall time and the
+            metrics if they were recorded
+    """
+    start = time.perf_counter()
+    log = None
+    if replay_dir is not None:
+        log = ReplayWriter(os.path.join(replay_dir, f"{maze}{size}-{seed}.bin"))
+    engine = ENGINES[maze](size, metrics=Metrics(metrics), log=log)
+    try:
+        info = run_episode(engine, seed, max_steps, layout)
+    finally:
+        if log is not None:
+            log.close()
+    result = info["result"]
+    episode = {
+        "seed": seed,
+        "win": result == "win",
+        "result": result or "unfinished",
+        "cause": result if engine.reward() < 0 else None,
+        "steps": info["steps"],
+        "sat_calls": engine.sat_calls(),
+        "wall_time": time.perf_counter() - start,
+    }
+    if metrics:
+        episode["metrics"] = engine.metrics.as_dict()
+    return episode
+
+
+def run_batch(args):
+    """
+    Runs the episodes over a pool of processes, writing the result of each one to
+    a JSON lines file as soon as it is available. With a corpus, the layout of each
+    episode is read from it by episode id and sent to the workers
+
+    Args:
+        args (argparse.Namespace): parsed command line arguments
+
+    Returns:
+        dict: totals over every episode
+    """
+    seeds = range(args.seed, args.seed + args.episodes)
+    layouts = [None] * args.episodes
+    if args.corpus is not None:
+        corpus = Corpus(args.corpus)
+        layouts = corpus.layouts[args.seed : args.seed + args.episodes].tolist()
+    totals = {
+        "episodes": 0,
+        "wins": 0,
+        "results": {},
+        "steps": 0,
+        "sat_calls": 0,
+        "wall_time": 0.0,
+    }
+    workers = args.workers or os.cpu_count()
+    if args.replay_dir is not None:
+        os.makedirs(args.replay_dir, exist_ok=True)
+    metrics = Metrics()
+    start = time.perf_counter()
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            episodes = pool.map(
+                play_episode,
+                [args.maze] * args.episodes,
+                [args.size] * args.episodes,
+                seeds,
+                [args.max_steps] * args.episodes,
+                [args.metrics] * args.episodes,
+                [args.replay_dir] * args.episodes,
+                layouts,
+                chunksize=max(1, args.episodes // (4 * workers)),
+            )
+            for episode in episodes:
+                out.write(json.dumps(episode) + "\n")
+                out.flush()
+                totals["episodes"] += 1
+                totals["wins"] += episode["win"]
+                results = totals["results"]
+                results[episode["result"]] = results.get(episode["result"], 0) + 1
+                for key in ["steps", "sat_calls", "wall_time"]:
+                    totals[key] += episode[key]
+                if args.metrics:
+                    metrics.merge(Metrics.from_dict(episode["metrics"]))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    totals["elapsed"] = time.perf_counter() - start
+    totals["win_rate"] = totals["wins"] / max(totals["episodes"], 1)
+    if args.metrics:
+        totals["metrics"] = metrics.as_dict()
+    return totals
+
+
+def play_interactive(render="full", fps=None):
+    """
+    Asks which maze to play and whether to run it automatically
+
+    Args:
+        render (str, optional): full, diff or silent. Defaults to "full".
+        fps (float, optional): most frames drawn per second. Defaults to None.
+    """
+    from labyrinth import LogicalMaze, BayesianMaze
 
-if __name__ == "__main__":
     option = input("Enter which maze you want to try: B (Bayesian) or L (Logical) ")
     while option not in ["B", "b", "L", "l"]:
         option = input("Enter which maze you want to try: B (Bayesian) or L (Logical)")
@@ -9,6 +142,75 @@ if __name__ == "__main__":
         auto = input("Do you want it to run automatically? ")
     auto = auto in ["Yes", "yes"]
     if option not in ["B", "b"]:
-        LogicalMaze(auto=auto)
+        LogicalMaze(auto=auto, render=render, fps=fps)
+    else:
+        BayesianMaze(auto=auto, render=render, fps=fps)
+
+
+def parse_args(argv=None):
+    """
+    Parses the command line. Without --episodes or --corpus the game is played
+    interactively. With a corpus, the maze and its size are the ones of the corpus
+    and every episode from --seed on is played unless --episodes is given
+
+    Args:
+        argv (list, optional): arguments. Defaults to None, the ones of the process.
+
+    Returns:
+        argparse.Namespace: the arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Play the maze, or run many automatic episodes in parallel"
+    )
+    parser.add_argument("--maze", choices=["L", "B"], default="L")
+    parser.add_argument("--size", type=int, default=6)
+    parser.add_argument("--episodes", type=int, default=None)
+    parser.add_argument(
+        "--seed", type=int, default=0, help="seed of the first episode"
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-steps", type=int, default=None)
+    parser.add_argument(
+        "--output", default="episodes.jsonl", help="JSON lines file, - for stdout"
+    )
+    parser.add_argument(
+        "--metrics", action="store_true", help="record counters and timings"
+    )
+    parser.add_argument(
+        "--replay-dir", default=None, help="directory where every game is recorded"
+    )
+    parser.add_argument(
+        "--corpus", default=None, help="layout file written by corpus.py"
+    )
+    parser.add_argument(
+        "--render",
+        choices=["full", "diff", "silent"],
+        default="full",
+        help="renderer of the interactive game",
+    )
+    parser.add_argument(
+        "--fps", type=float, default=None, help="most frames drawn per second"
+    )
+    args = parser.parse_args(argv)
+    if args.corpus is not None:
+        corpus = Corpus(args.corpus)
+        args.maze = corpus.maze
+        args.size = corpus.size
+        available = len(corpus) - args.seed
+        if args.episodes is None:
+            args.episodes = available
+        if not 0 <= args.episodes <= available:
+            parser.error(f"the corpus has {len(corpus)} episodes")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.episodes is None:
+        play_interactive(args.render, args.fps)
     else:
-        BayesianMaze(auto=auto)
+        totals = run_batch(args)
+        # The totals go to stderr when the episodes are streamed to stdout
+        print(
+            json.dumps(totals), file=sys.stderr if args.output == "-" else sys.stdout
+        )
@@ -0,0 +1,161 @@
+import json
+import time
+
+
+class Metrics:
+    """
+    Counters and timings of a maze run. The agents, the search and the engines
+    report to the metrics they are given, and a disabled instance ignores every
+    report, so instrumented code costs a method call when metrics are off.
+
+    Timings are kept per phase as a total, a count and a histogram whose bucket k
+    holds the durations below 2**k microseconds (and at least 2**(k-1))
+    """
+
+    def __init__(self, enabled=True) -> None:
+        """
+        Class constructor
+
+        Args:
+            enabled (bool, optional): whether the reports are recorded. Defaults to True.
+        """
+        self.enabled = enabled
+        self.counters = {}
+        self.gauges = {}
+        self.timings = {}
+
+    def count(self, name, value=1):
+        """
+        Increases a counter
+
+        Args:
+            name (str): the counter
+            value (int, optional): the increase. Defaults to 1.
+        """
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name, value):
+        """
+        Sets the current value of a quantity, like the size of the KB
+
+        Args:
+            name (str): the quantity
+            value (int): its value
+        """
+        if self.enabled:
+            self.gauges[name] = value
+
+    def clock(self):
+        """
+        Starts timing a phase
+
+        Returns:
+            float: the start time, 0 if the metrics are disabled
+        """
+        return time.perf_counter() if self.enabled else 0
+
+    def record(self, name, start):
+        """
+        Ends timing a phase started with clock
+
+        Args:
+            name (str): the phase
+            start (float): value returned by clock
+        """
+        if self.enabled:
+            self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name, elapsed):
+        """
+        Adds a duration measured elsewhere to the timings of a phase
+
+        Args:
+            name (str): the phase
+            elapsed (float): the duration in seconds
+        """
+        if not self.enabled:
+            return
+        timing = self.timings.get(name)
+        if timing is None:
+            timing = self.timings[name] = {"total": 0.0, "count": 0, "histogram": []}
+        timing["total"] += elapsed
+        timing["count"] += 1
+        bucket = int(elapsed * 1e6).bit_length()
+        histogram = timing["histogram"]
+        if bucket >= len(histogram):
+            histogram.extend([0] * (bucket + 1 - len(histogram)))
+        histogram[bucket] += 1
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuilds metrics from the output of as_dict
+
+        Args:
+            data (dict): the metrics
+
+        Returns:
+            Metrics: the metrics
+        """
+        metrics = cls()
+        metrics.counters = dict(data["counters"])
+        metrics.gauges = dict(data["gauges"])
+        metrics.timings = {
+            name: {
+                "total": timing["total"],
+                "count": timing["count"],
+                "histogram": list(timing["histogram"]),
+            }
+            for name, timing in data["timings"].items()
+        }
+        return metrics
+
+    def merge(self, other):
+        """
+        Adds the counters and timings of other metrics, and takes their gauges
+
+        Args:
+            other (Metrics): the other metrics
+        """
+        for name, value in other.counters.items():
+            self.counters[name] = self.counters.get(name, 0) + value
+        self.gauges.update(other.gauges)
+        for name, timing in other.timings.items():
+            mine = self.timings.setdefault(
+                name, {"total": 0.0, "count": 0, "histogram": []}
+            )
+            mine["total"] += timing["total"]
+            mine["count"] += timing["count"]
+            histogram = mine["histogram"]
+            if len(histogram) < len(timing["histogram"]):
+                histogram.extend([0] * (len(timing["histogram"]) - len(histogram)))
+            for bucket, count in enumerate(timing["histogram"]):
+                histogram[bucket] += count
+
+    def as_dict(self):
+        """
+        Returns every metric
+
+        Returns:
+            dict: counters, gauges and timings (total and mean in seconds, count and
+                histogram)
+        """
+        timings = {}
+        for name, timing in self.timings.items():
+            timings[name] = dict(timing, mean=timing["total"] / timing["count"])
+        return {"counters": self.counters, "gauges": self.gauges, "timings": timings}
+
+    def dump(self, fn):
+        """
+        Writes every metric to a JSON file
+
+        Args:
+            fn (str): the file
+        """
+        with open(fn, "w") as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+
+# Shared by every component created without metrics
+DISABLED = Metrics(enabled=False)
@@ -0,0 +1,343 @@
+import shutil
+import sys
+import time
+from collections import deque
+
+"""
+Terminal renderers of the mazes. A renderer draws the board of a maze and the
+messages of the game, at most a number of frames per second. The plain renderer
+prints every frame in full, the diff renderer redraws only the cells that changed
+using ANSI cursor addressing, and the silent renderer draws nothing
+"""
+
+CLEAR_SCREEN = "\x1b[2J\x1b[H"
+CLEAR_BELOW = "\x1b[J"
+
+
+def move_to(row, col):
+    """
+    ANSI sequence that moves the cursor
+
+    Args:
+        row (int): row of the terminal, from 1
+        col (int): column of the terminal, from 1
+
+    Returns:
+        str: the sequence
+    """
+    return f"\x1b[{row};{col}H"
+
+
+class Renderer:
+    """
+    Prints the whole board at every frame, and the messages as they come
+    """
+
+    silent = False
+
+    def __init__(self, maze, fps=None, out=None) -> None:
+        """
+        Class constructor
+
+        Args:
+            maze (BaseMaze): the maze
+            fps (float, optional): most frames drawn per second, the rest are
+                skipped. Defaults to None, no limit.
+            out (file, optional): where the frames are written. Defaults to None,
+                the standard output.
+        """
+        self.maze = maze
+        self.out = out or sys.stdout
+        self.interval = 1 / fps if fps else 0
+        self.last_frame = None
+        self.pending = False
+
+    def revealed(self):
+        """
+        Bitmap of the cells shown, one bit per cell indexed by row * n + col
+
+        Returns:
+            bytearray: the bitmap
+        """
+        engine = self.maze.engine
+        if self.maze.sol:
+            return bytearray(b"\xff" * len(engine.visited.bits))
+        return bytearray(
+            a | b for a, b in zip(engine.visited.bits, engine.viewed.bits)
+        )
+
+    def cell_lines(self, x, y, revealed):
+        """
+        The two lines of text of a cell inside its borders
+
+        Args:
+            x (int): row
+            y (int): column
+            revealed (bytearray): bitmap of the cells shown
+
+        Returns:
+            str, str: the top and bottom lines
+        """
+        index = x * self.maze.size + y
+        if not revealed[index >> 3] & (1 << (index & 7)):
+            return "? ?", "? ?"
+        text = self.maze.engine.cell_text(x, y)
+        return f"{text[0]} {text[1]}", f"{text[2]} {text[3]}"
+
+    def board(self):
+        """
+        The whole board
+
+        Returns:
+            str: the board, ending in a new line
+        """
+        n = self.maze.size
+        revealed = self.revealed()
+        border = "-----" * n
+        lines = [border]
+        for x in range(n):
+            top = []
+            bottom = []
+            for y in range(n):
+                first, second = self.cell_lines(x, y, revealed)
+                top.append(f"|{first}|")
+                bottom.append(f"|{second}|")
+            lines.append("".join(top))
+            lines.append("".join(bottom))
+            lines.append(border)
+        lines.append("")
+        return "\n".join(lines)
+
+    def hint_line(self):
+        """
+        Messages of what the player perceives from the adjacent cells
+
+        Returns:
+            str: the messages
+        """
+        maze = self.maze
+        line = "".join(maze.messages[i] + " " for i in maze.engine.hints())
+        if maze.engine.scream:
+            line = line.replace("You smell something", maze.messages[5])
+        return line
+
+    def due(self, force=False):
+        """
+        Checks whether a frame can be drawn without exceeding the frame rate
+
+        Args:
+            force (bool, optional): whether to draw it anyway. Defaults to False.
+
+        Returns:
+            bool: whether to draw it
+        """
+        now = time.perf_counter()
+        if force or self.last_frame is None or now - self.last_frame >= self.interval:
+            self.last_frame = now
+            self.pending = False
+            return True
+        self.pending = True
+        return False
+
+    def frame(self, force=False):
+        """
+        Draws the current state of the maze, unless the frame rate is exceeded
+
+        Args:
+            force (bool, optional): whether to draw it anyway. Defaults to False.
+
+        Returns:
+            bool: whether it was drawn
+        """
+        if not self.due(force):
+            return False
+        self.out.write(self.board() + self.hint_line() + "\n")
+        return True
+
+    def message(self, text):
+        """
+        Shows a message of the game
+
+        Args:
+            text (str): the message
+        """
+        self.out.write(text + "\n")
+
+    def flush(self):
+        """
+        Shows every message so far, before the player is asked for an action
+        """
+        self.out.flush()
+
+    def finish(self):
+        """
+        Draws the last state of the maze if its frame was skipped
+        """
+        if self.pending:
+            self.frame(force=True)
+        self.out.flush()
+
+
+class DiffRenderer(Renderer):
+    """
+    Draws the board once and then rewrites only the cells that changed, moving the
+    cursor to them. The messages since the last frame are shown below the board
+    """
+
+    def __init__(self, maze, fps=None, out=None, status_lines=8) -> None:
+        """
+        Class constructor
+
+        Args:
+            maze (BaseMaze): the maze
+            fps (float, optional): most frames drawn per second. Defaults to None.
+            out (file, optional): where the frames are written. Defaults to None.
+            status_lines (int, optional): most messages kept below the board.
+                Defaults to 8.
+        """
+        super().__init__(maze, fps, out)
+        self.messages = deque(maxlen=status_lines)
+        # Messages received and written by flush since the last frame
+        self.received = 0
+        self.flushed = 0
+        self.drawn = None
+        self.seen = (0, 0)
+        self.position = None
+
+    def fits(self):
+        """
+        Checks whether the board and the messages below it fit in the terminal.
+        Otherwise the screen scrolls and the cursor addresses land on the wrong rows
+
+        Returns:
+            bool: whether they fit
+        """
+        columns, lines = shutil.get_terminal_size()
+        n = self.maze.size
+        return 5 * n <= columns and 3 * n + 3 + self.messages.maxlen <= lines
+
+    def dirty_cells(self):
+        """
+        Cells whose text may have changed since the last frame: the ones revealed
+        since then and the cells of the player then and now
+
+        Returns:
+            set: the cells, as (row, col) tuples
+        """
+        engine = self.maze.engine
+        cells = set(engine.visited.added_since(self.seen[0]))
+        cells.update(engine.viewed.added_since(self.seen[1]))
+        cells.add(self.position)
+        cells.add(tuple(engine.pos))
+        return cells
+
+    def frame(self, force=False):
+        """
+        Redraws the cells that changed and the messages, unless the frame rate is
+        exceeded. The first frame clears the screen and draws the whole board, and
+        so does every frame while the board does not fit in the terminal
+
+        Args:
+            force (bool, optional): whether to draw it anyway. Defaults to False.
+
+        Returns:
+            bool: whether it was drawn
+        """
+        if not self.due(force):
+            return False
+        if not self.fits():
+            # Whole frames until the terminal is large enough, then a new first frame
+            self.drawn = None
+            messages = self.unflushed()
+            self.messages.clear()
+            self.received = self.flushed = 0
+            self.out.write(
+                self.board() + "\n".join([self.hint_line(), *messages]) + "\n"
+            )
+            self.out.flush()
+            return True
+        engine = self.maze.engine
+        n = self.maze.size
+        revealed = self.revealed()
+        parts = []
+        if self.drawn is None:
+            self.drawn = [
+                self.cell_lines(x, y, revealed) for x in range(n) for y in range(n)
+            ]
+            parts.append(CLEAR_SCREEN + self.board())
+        else:
+            for x, y in self.dirty_cells():
+                lines = self.cell_lines(x, y, revealed)
+                if lines != self.drawn[x * n + y]:
+                    self.drawn[x * n + y] = lines
+                    parts.append(move_to(3 * x + 2, 5 * y + 2) + lines[0])
+                    parts.append(move_to(3 * x + 3, 5 * y + 2) + lines[1])
+        self.seen = (len(engine.visited), len(engine.viewed))
+        self.position = tuple(engine.pos)
+        parts.append(move_to(3 * n + 2, 1) + CLEAR_BELOW)
+        parts.append("\n".join([self.hint_line(), *self.messages]) + "\n")
+        self.messages.clear()
+        self.received = self.flushed = 0
+        self.out.write("".join(parts))
+        self.out.flush()
+        return True
+
+    def unflushed(self):
+        """
+        Messages kept since the last frame that flush has not written. The oldest
+        ones may have been dropped by the deque
+
+        Returns:
+            list: the messages
+        """
+        pending = min(self.received - self.flushed, len(self.messages))
+        return list(self.messages)[len(self.messages) - pending :]
+
+    def message(self, text):
+        """
+        Keeps a message to show it in the next frame
+
+        Args:
+            text (str): the message
+        """
+        self.messages.append(text)
+        self.received += 1
+
+    def flush(self):
+        """
+        Writes the messages kept since the last frame below it. The next frame
+        shows them again in place
+        """
+        messages = self.unflushed()
+        self.flushed = self.received
+        self.out.write("".join(text + "\n" for text in messages))
+        self.out.flush()
+
+    def finish(self):
+        """
+        Draws the last state of the maze and its messages
+        """
+        self.frame(force=True)
+
+
+class SilentRenderer(Renderer):
+    """
+    Draws nothing, for automated runs
+    """
+
+    silent = True
+
+    def frame(self, force=False):
+        return False
+
+    def message(self, text):
+        pass
+
+    def flush(self):
+        pass
+
+    def finish(self):
+        pass
+
+
+RENDERERS = {"full": Renderer, "diff": DiffRenderer, "silent": SilentRenderer}
@@ -0,0 +1,229 @@
+import argparse
+import struct
+from engine import LogicalEngine, BayesianEngine
+
+"""
+Compact binary logs of games. A log is a sequence of games, each one a header with
+the maze and its layout followed by one record per step, appended as the game runs.
+Replaying a log applies the recorded actions with the rules of the game only, so any
+step can be rebuilt without running the agents
+"""
+
+REPLAY_MAGIC = b"MZRP"
+REPLAY_VERSION = 1
+# Magic, version, maze, first percept, size and the cell of each of the 6 elements
+REPLAY_HEADER = struct.Struct("<4sBBHI6I")
+# Action (low 4 bits) and direction (high bits), and the percept after the step.
+# The first byte of a step is always below the first byte of the magic
+REPLAY_STEP = struct.Struct("<BH")
+ENGINES = [LogicalEngine, BayesianEngine]
+ACTIONS = ["UP", "DOWN", "LEFT", "RIGHT", "EXIT", "GRENADE", "BLOWGUN"]
+DIRECTIONS = [None, "UP", "DOWN", "LEFT", "RIGHT"]
+
+
+def percept_mask(percept):
+    """
+    Packs a percept into an integer, one bit per position
+
+    Args:
+        percept (list): list of 1s and 0s
+
+    Returns:
+        int: the bitmask
+    """
+    mask = 0
+    for ind, value in enumerate(percept):
+        if value:
+            mask |= 1 << ind
+    return mask
+
+
+def mask_percept(mask, length):
+    """
+    Unpacks a percept packed by percept_mask
+
+    Args:
+        mask (int): the bitmask
+        length (int): number of positions of the percept
+
+    Returns:
+        list: list of 1s and 0s
+    """
+    return [(mask >> ind) & 1 for ind in range(length)]
+
+
+class ReplayWriter:
+    """
+    Records the games of an engine. It is passed to the engine as its log
+    """
+
+    def __init__(self, fn) -> None:
+        """
+        Class constructor. Games are appended to the file
+
+        Args:
+            fn (str): the file
+        """
+        self.file = open(fn, "ab")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self, engine):
+        """
+        Writes the header of a new game
+
+        Args:
+            engine (BaseEngine): the engine, just reset
+        """
+        kind = next(i for i, cls in enumerate(ENGINES) if isinstance(engine, cls))
+        self.file.write(
+            REPLAY_HEADER.pack(
+                REPLAY_MAGIC,
+                REPLAY_VERSION,
+                kind,
+                percept_mask(engine.percept),
+                engine.size,
+                *engine.layout,
+            )
+        )
+
+    def step(self, action, direction, percept):
+        """
+        Writes a step
+
+        Args:
+            action (str): the action
+            direction (str): direction of the weapon, or None
+            percept (list): the percept after the step
+        """
+        code = ACTIONS.index(action) | DIRECTIONS.index(direction) << 4
+        self.file.write(REPLAY_STEP.pack(code, percept_mask(percept)))
+
+    def close(self):
+        """
+        Closes the file
+        """
+        self.file.close()
+
+
+class Replay:
+    """
+    A recorded game
+    """
+
+    def __init__(self, engine_class, size, layout, percepts, actions) -> None:
+        """
+        Class constructor
+
+        Args:
+            engine_class (type): engine of the maze
+            size (int): size of the maze
+            layout (list): cell of each element
+            percepts (list): percept bitmask before the first step and after each one
+            actions (list): action and direction of each step
+        """
+        self.engine_class = engine_class
+        self.size = size
+        self.layout = layout
+        self.percepts = percepts
+        self.actions = actions
+
+    def __len__(self):
+        return len(self.actions)
+
+    def engine_at(self, step):
+        """
+        Rebuilds the game after a number of steps, checking every percept against
+        the recorded one
+
+        Args:
+            step (int): number of steps applied
+
+        Raises:
+            ValueError: if the game does not match the log
+
+        Returns:
+            BaseEngine: an engine without agent in the state of the game
+        """
+        if not 0 <= step <= len(self.actions):
+            raise ValueError(f"The game has {len(self.actions)} steps")
+        engine = self.engine_class(self.size, infer=False)
+        percept, _ = engine.reset(layout=self.layout)
+        for ind in range(step + 1):
+            if percept_mask(percept) != self.percepts[ind]:
+                raise ValueError(f"The percept of step {ind} does not match the log")
+            if ind < step:
+                percept, _, _, _ = engine.step(*self.actions[ind])
+        return engine
+
+
+def read_replays(fn):
+    """
+    Reads every game of a log
+
+    Args:
+        fn (str): the file
+
+    Raises:
+        ValueError: if the file is not a log
+
+    Returns:
+        list: the games, as Replay objects
+    """
+    with open(fn, "rb") as f:
+        data = f.read()
+    replays = []
+    offset = 0
+    while offset < len(data):
+        header = REPLAY_HEADER.unpack_from(data, offset)
+        magic, version, kind, percept, size = header[:5]
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError(f"{fn} is not a replay log of version {REPLAY_VERSION}")
+        offset += REPLAY_HEADER.size
+        percepts = [percept]
+        actions = []
+        while offset < len(data) and data[offset] != REPLAY_MAGIC[0]:
+            code, percept = REPLAY_STEP.unpack_from(data, offset)
+            offset += REPLAY_STEP.size
+            actions.append((ACTIONS[code & 15], DIRECTIONS[code >> 4]))
+            percepts.append(percept)
+        replays.append(Replay(ENGINES[kind], size, list(header[5:]), percepts, actions))
+    return replays
+
+
+def parse_args(argv=None):
+    """
+    Parses the command line
+
+    Args:
+        argv (list, optional): arguments. Defaults to None, the ones of the process.
+
+    Returns:
+        argparse.Namespace: the arguments
+    """
+    parser = argparse.ArgumentParser(description="Show a step of a recorded game")
+    parser.add_argument("log")
+    parser.add_argument("--game", type=int, default=0, help="index of the game")
+    parser.add_argument(
+        "--step", type=int, default=None, help="steps applied, the last by default"
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    replay = read_replays(args.log)[args.game]
+    step = len(replay) if args.step is None else args.step
+    engine = replay.engine_at(step)
+    for x in range(engine.size):
+        print("".join(f"|{engine.cell_text(x, y)}|" for y in range(engine.size)))
+    print(f"Step {step} of {len(replay)}, position {engine.pos}")
+    print(f"Percept: {engine.percept}")
+    if step:
+        print(f"Last action: {' '.join(a for a in replay.actions[step - 1] if a)}")
+    for event in engine.events:
+        print(event)
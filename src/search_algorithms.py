@@ -1,18 +1,194 @@
+import heapq
+from collections import deque
+import numpy as np
+from cells import CellSet
+from metrics import DISABLED
+
+
+class Frontier:
+    """
+    Ordered set of frontier cells with O(1) insertion, membership and removal.
+    Every cell remembers the order in which it was added
+    """
+
+    def __init__(self, cells=()) -> None:
+        """
+        Class constructor
+
+        Args:
+            cells (iterable, optional): initial cells. Defaults to ().
+        """
+        self.cells = {}
+        self.queue = deque()
+        self.count = 0
+        for cell in cells:
+            self.add(cell)
+
+    def __contains__(self, cell):
+        return tuple(cell) in self.cells
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def add(self, cell):
+        """
+        Adds a cell at the end of the frontier if it is not already in it
+
+        Args:
+            cell (tuple): the cell
+
+        Returns:
+            bool: whether the cell was added
+        """
+        cell = tuple(cell)
+        if cell in self.cells:
+            return False
+        self.cells[cell] = self.count
+        self.queue.append((self.count, cell))
+        self.count += 1
+        return True
+
+    def discard(self, cell):
+        """
+        Removes a cell from the frontier if it is in it
+
+        Args:
+            cell (tuple): the cell
+        """
+        self.cells.pop(tuple(cell), None)
+
+    def remove(self, cell):
+        """
+        Removes a cell from the frontier
+
+        Args:
+            cell (tuple): the cell
+
+        Raises:
+            ValueError: if the cell is not in the frontier
+        """
+        if self.cells.pop(tuple(cell), None) is None:
+            raise ValueError(f"{cell} is not in the frontier")
+
+    def order(self, cell):
+        """
+        Returns the position in which a cell was added
+
+        Args:
+            cell (tuple): the cell
+
+        Returns:
+            int: insertion order
+        """
+        return self.cells[tuple(cell)]
+
+    def first(self):
+        """
+        Returns the oldest cell of the frontier. Removed cells are dropped from
+        the front of the queue lazily
+
+        Returns:
+            tuple: the cell, or None if the frontier is empty
+        """
+        while self.queue:
+            order, cell = self.queue[0]
+            if self.cells.get(cell) == order:
+                return cell
+            self.queue.popleft()
+        return None
+
+
 class SearchAlgorithms:
     """
     Base class that contains various search algorithms and support functions
     """
 
-    def __init__(self, n) -> None:
+    def __init__(self, n, metrics=None) -> None:
         """
         Class constructor
 
         Args:
             n (int): the size of the maze
+            metrics (Metrics, optional): where node expansions are counted.
+                Defaults to None.
         """
         self.n = n
-        self.frontier = []
+        self.metrics = metrics or DISABLED
+        self.frontier = Frontier()
         self.generated_moves = []
+        self.safe = CellSet(n)
+        self.safe_source = None
+        self.safe_count = 0
+        self.safe_frontier = []
+        self.walkable = bytearray(n * n)
+        self.walkable_source = None
+        self.walkable_count = 0
+
+    def walkable_cells(self, visited):
+        """
+        Returns a bitmap of the visited cells, indexed by row * n + col. The
+        visited set only grows, so only the cells added since the last call
+        are written
+
+        Args:
+            visited (CellSet): visited cells
+
+        Returns:
+            bytearray: 1 for visited cells, 0 for the rest
+        """
+        if visited is not self.walkable_source or len(visited) < self.walkable_count:
+            self.walkable = bytearray(self.n * self.n)
+            self.walkable_source = visited
+            self.walkable_count = 0
+        for x, y in visited.added_since(self.walkable_count):
+            self.walkable[x * self.n + y] = 1
+        self.walkable_count = len(visited)
+        return self.walkable
+
+    def add_to_frontier(self, cell):
+        """
+        Adds a cell to the frontier, keeping the safe cells of the frontier up
+        to date
+
+        Args:
+            cell (tuple): the cell
+        """
+        if self.frontier.add(cell):
+            cell = tuple(cell)
+            if cell in self.safe:
+                heapq.heappush(self.safe_frontier, (self.frontier.order(cell), cell))
+
+    def remove_from_frontier(self, cell):
+        """
+        Removes a cell from the frontier
+
+        Args:
+            cell (tuple): the cell
+        """
+        self.frontier.remove(cell)
+
+    def sync_safe_cells(self, safe_cells):
+        """
+        Adds the cells added to the set of safe cells since the last call
+
+        Args:
+            safe_cells (CellSet): safe cells, a set that only grows
+        """
+        if safe_cells is not self.safe_source or len(safe_cells) < self.safe_count:
+            self.safe = CellSet(self.n)
+            self.safe_frontier = []
+            self.safe_source = safe_cells
+            self.safe_count = 0
+        for cell in safe_cells.added_since(self.safe_count):
+            if self.safe.add(cell):
+                if cell in self.frontier:
+                    heapq.heappush(
+                        self.safe_frontier, (self.frontier.order(cell), cell)
+                    )
+        self.safe_count = len(safe_cells)
 
     def choose_bfs_move(self, safe_cells):
         """
@@ -20,64 +196,81 @@ class SearchAlgorithms:
         the safe cells and then from the rest
 
         Args:
-            safe_cells (list): safe cells
+            safe_cells (CellSet): safe cells
 
         Returns:
             tuple: the destination cell
         """
-        safe_list = [(x, y) for x, y in self.frontier if [x, y] in safe_cells]
-        if safe_list:
-            next_move = safe_list[0]
-        else:
-            next_move = self.frontier[0]
-        return next_move
+        self.sync_safe_cells(safe_cells)
+        while self.safe_frontier:
+            order, cell = self.safe_frontier[0]
+            if cell in self.frontier and self.frontier.order(cell) == order:
+                return cell
+            heapq.heappop(self.safe_frontier)
+        return self.frontier.first()
 
     def a_star_on_known(self, start, goal, visited):
         """
         Finds the shortest path from one visited cell to another using
-        the A* algorithm
+        the A* algorithm. The open set is a binary heap with lazy deletion:
+        improved nodes are pushed again and outdated entries are skipped.
+        Ties are broken by the order in which nodes were opened
 
         Args:
             start (tuple): starting cell
             goal (tuple): goal cell
-            visited (list): cells we can move through
+            visited (CellSet): cells we can move through
 
         Returns:
             list: path to the goal
         """
+        walkable = self.walkable_cells(visited)
         f_score = lambda x: abs(x[0] - goal[0]) + abs(x[1] - goal[1])
         values = {start: f_score(start)}
+        opened = {start: 0}
+        heap = [(values[start], 0, start)]
 
         parents = {}
         costs = {start: 0}
+        expansions = 0
 
-        while values:
-            current_node = min(values, key=lambda x: values[x])
+        while heap:
+            value, _, current_node = heapq.heappop(heap)
+            if values.get(current_node) != value:
+                continue
 
             del values[current_node]
+            expansions += 1
 
-            if (
-                goal in self.get_adjacent(current_node[0], current_node[1], visited)
-                or goal == current_node
+            if goal == current_node or (
+                abs(goal[0] - current_node[0]) + abs(goal[1] - current_node[1]) == 1
+                and not walkable[goal[0] * self.n + goal[1]]
             ):
                 path = []
                 while current_node in parents:
                     path.append(current_node)
                     current_node = parents[current_node]
 
+                self.metrics.count("astar_expansions", expansions)
                 return path[::-1]
-            visited_adj = self.get_visited_adjacent(
+            for neighbor in self.get_visited_adjacent(
                 current_node[0], current_node[1], visited
-            )
-            for neighbor in visited_adj:
+            ):
+                neighbor = tuple(neighbor)
                 hypothetical_value = costs[current_node] + 1 + f_score(neighbor)
-                if tuple(neighbor) not in costs or hypothetical_value < values.get(
-                    tuple(neighbor), -1
+                if neighbor not in costs or hypothetical_value < values.get(
+                    neighbor, -1
                 ):
-                    values[tuple(neighbor)] = hypothetical_value
-                    costs[tuple(neighbor)] = costs[tuple(current_node)] + 1
-                    parents[tuple(neighbor)] = current_node
-
+                    if neighbor not in values:
+                        opened[neighbor] = len(opened)
+                    values[neighbor] = hypothetical_value
+                    costs[neighbor] = costs[current_node] + 1
+                    parents[neighbor] = current_node
+                    heapq.heappush(
+                        heap, (hypothetical_value, opened[neighbor], neighbor)
+                    )
+
+        self.metrics.count("astar_expansions", expansions)
         return None
 
     def get_adjacent(self, row, col, visited):
@@ -88,18 +281,15 @@ class SearchAlgorithms:
         Args:
             row (int): row
             col (int): column
-            visited (list): already visited cells
+            visited (CellSet): already visited cells
 
         Returns:
             list: unvisited adjacent cells
         """
+        walkable = self.walkable_cells(visited)
         adjacent = []
         for x, y in [(row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)]:
-            if (
-                x in range(0, self.n)
-                and y in range(0, self.n)
-                and [x, y] not in visited
-            ):
+            if 0 <= x < self.n and 0 <= y < self.n and not walkable[x * self.n + y]:
                 adjacent.append((x, y))
 
         return adjacent
@@ -111,19 +301,15 @@ class SearchAlgorithms:
         Args:
             row (int): row
             col (int): column
-            visited (list): visited cells
+            visited (CellSet): visited cells
 
         Returns:
             list: visited adjacent cells
         """
+        walkable = self.walkable_cells(visited)
         visited_adjacent = []
         for x, y in [(row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)]:
-            if (
-                x in range(0, self.n)
-                and y in range(0, self.n)
-                and [x, y] in visited
-                and [x, y] != [row, col]
-            ):
+            if 0 <= x < self.n and 0 <= y < self.n and walkable[x * self.n + y]:
                 visited_adjacent.append([x, y])
         return visited_adjacent
 
@@ -158,36 +344,38 @@ class SearchAlgorithms:
         """
         Greedy algorithm to choose the next move. Given the
         probability matrix, it chooses the cell in the frontier with the least
-        chance of the player dying
+        chance of the player dying. The probabilities of the whole frontier are
+        read at once, ties are broken by the order of the cells in the frontier
 
         Args:
             probability_matrix (list): matrix with the probabilities of elements for each cell
 
         Returns:
-            tuple: the node we want to go to
+            tuple: the node we want to go to, or None if the frontier is empty
         """
-        prob_die = lambda x: sum(
-            i for i in x[:4]
-        )  # sum of the 4 probabilities because they are disjoint
-        next_move = min(
-            self.frontier, key=lambda x: prob_die(probability_matrix[x[0]][x[1]])
-        )
-        return next_move
-
+        cells = list(self.frontier)  # in the order they were added
+        if not cells:
+            return None
+        rows, cols = np.array(cells).T
+        # sum of the 4 probabilities because they are disjoint
+        prob_die = np.asarray(probability_matrix[rows, cols])[:, :4].sum(axis=1)
+        self.metrics.count("cells_ranked", len(cells))
+        return cells[int(np.argmin(prob_die))]
 
 class LogicalSearch(SearchAlgorithms):
     """
     Search in the logical maze
     """
 
-    def __init__(self, n=6) -> None:
+    def __init__(self, n=6, metrics=None) -> None:
         """
         Class constructor
 
         Args:
             n (int, optional): size of the maze. Defaults to 6.
+            metrics (Metrics, optional): metrics of the run. Defaults to None.
         """
-        super().__init__(n)
+        super().__init__(n, metrics)
         self.kurt_found = False
         self.exit_pos = []
         self.previous_goal = None
@@ -198,16 +386,15 @@ class LogicalSearch(SearchAlgorithms):
         the next one, otherwise it generates the next moves
 
         Args:
-            safe_cells (list): safe cells
+            safe_cells (CellSet): safe cells
             pos (list): player's position
-            visited (list): visited cells
+            visited (CellSet): visited cells
 
         Returns:
             str: the action to be executed
         """
         for i in self.get_adjacent(pos[0], pos[1], visited):
-            if i not in self.frontier + pos:
-                self.frontier.append(i)
+            self.add_to_frontier(i)
         if (
             self.kurt_found and self.exit_pos and not self.generated_moves
         ):  # if we have found Kurtz and the exit, we go directly to the exit and leave the maze
@@ -219,7 +406,7 @@ class LogicalSearch(SearchAlgorithms):
 
         elif not self.generated_moves:  # Generate new moves
             if self.previous_goal:
-                self.frontier.remove(tuple(self.previous_goal))
+                self.remove_from_frontier(self.previous_goal)
             path = []
             final_goal = self.choose_bfs_move(safe_cells)
             if final_goal not in self.get_adjacent(pos[0], pos[1], visited):
@@ -227,9 +414,7 @@ class LogicalSearch(SearchAlgorithms):
 
             self.generated_moves = self.convert_to_actions(path + [final_goal], pos)
             self.previous_goal = final_goal
-        move = self.generated_moves.pop(0)
-        print(move)
-        return move
+        return self.generated_moves.pop(0)
 
 
 class BayesianSearch(SearchAlgorithms):
@@ -237,14 +422,15 @@ class BayesianSearch(SearchAlgorithms):
     Bayesian search class
     """
 
-    def __init__(self, n=6) -> None:
+    def __init__(self, n=6, metrics=None) -> None:
         """
         Class constructor
 
         Args:
             n (int, optional): The size of the maze. Defaults to 6.
+            metrics (Metrics, optional): metrics of the run. Defaults to None.
         """
-        super().__init__(n)
+        super().__init__(n, metrics)
         self.kurt_found = False
         self.exit_pos = []
         self.previous_goal = None
@@ -257,14 +443,13 @@ class BayesianSearch(SearchAlgorithms):
         Args:
             probability_matrix (list): matrix with the probabilities of the presence of each element
             pos (list): player's position
-            visited (list): visited cells
+            visited (CellSet): visited cells
 
         Returns:
             str: next action
         """
         for i in self.get_adjacent(pos[0], pos[1], visited):
-            if i not in self.frontier + pos:
-                self.frontier.append(i)
+            self.add_to_frontier(i)
         if self.kurt_found and self.exit_pos and not self.generated_moves:
             if self.exit_pos != pos:
                 path = self.a_star_on_known(tuple(pos), tuple(self.exit_pos), visited)
@@ -274,7 +459,7 @@ class BayesianSearch(SearchAlgorithms):
 
         elif not self.generated_moves:
             if self.previous_goal:
-                self.frontier.remove(tuple(self.previous_goal))
+                self.remove_from_frontier(self.previous_goal)
             path = []
             final_goal = self.choose_greedy_move(probability_matrix)
             if final_goal not in self.get_adjacent(pos[0], pos[1], visited):
@@ -282,6 +467,4 @@ class BayesianSearch(SearchAlgorithms):
 
             self.generated_moves = self.convert_to_actions(path + [final_goal], pos)
             self.previous_goal = final_goal
-        move = self.generated_moves.pop(0)
-        print(move)
-        return move
+        return self.generated_moves.pop(0)
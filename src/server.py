@@ -0,0 +1,309 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from labyrinth import LogicalMaze, BayesianMaze
+from metrics import Metrics
+
+"""
+Local game server. Clients send one JSON request per line over TCP or a Unix
+socket and get one JSON response per line. Every connection owns a game session,
+a LogicalMaze or a BayesianMaze that is played through its engine.
+
+The sessions live in worker processes, one per shard, and a connection always
+talks to the same shard. The inference of the agents runs there, so a slow SAT
+step never blocks the event loop or the other shards. A shard runs one request
+at a time, so the sessions that share a shard with a slow one wait behind it:
+the session state lives in the shard's process, and more workers spread the
+sessions thinner.
+
+Requests:
+    {"op": "new", "maze": "L", "size": 6, "seed": 0, "layout": null,
+     "backend": "marginal", "sol": false}  starts a game
+    {"op": "step", "action": "UP", "direction": null}  executes an action
+    {"op": "auto"}  executes the action chosen by the search algorithm
+    {"op": "board"}  shows the maze
+    {"op": "stats"}  latency of the requests of the session
+    {"op": "close"}  ends the session
+"""
+
+DEFAULT_PORT = 7654
+# The elements of both mazes need at least 6 cells off the start
+MIN_SIZE = 3
+MAX_SIZE = 64
+MAZES = {"L": LogicalMaze, "B": BayesianMaze}
+# Sessions of a worker process, by id
+SESSIONS = {}
+
+
+def game_state(maze, percept, info):
+    """
+    State of a game sent to the client after every action
+
+    Args:
+        maze (BaseMaze): the maze
+        percept (list): the last percept
+        info (dict): info returned by the engine
+
+    Returns:
+        dict: the percept, the info and the messages of the adjacent cells
+    """
+    return {
+        "percept": percept,
+        "info": info,
+        "hints": maze.renderer.hint_line().strip(),
+    }
+
+
+def new_game(session, request):
+    """
+    Starts the game of a session, replacing the one it had
+
+    Args:
+        session (int): id of the session
+        request (dict): the request
+
+    Raises:
+        ValueError: if the maze or its size are not valid
+
+    Returns:
+        dict: the state of the game
+    """
+    kind = request.get("maze", "L")
+    if kind not in MAZES:
+        raise ValueError(f"Unknown maze: {kind}")
+    size = int(request.get("size", 6))
+    if not MIN_SIZE <= size <= MAX_SIZE:
+        raise ValueError(f"The size must be between {MIN_SIZE} and {MAX_SIZE}")
+    options = {}
+    if kind == "B":
+        options["backend"] = request.get("backend", "marginal")
+    maze = MAZES[kind](
+        size,
+        sol=bool(request.get("sol", False)),
+        auto=True,
+        seed=request.get("seed"),
+        layout=request.get("layout"),
+        render="silent",
+        play=False,
+        **options,
+    )
+    SESSIONS[session] = maze
+    engine = maze.engine
+    return game_state(maze, engine.percept, engine.info())
+
+
+def handle_request(session, request):
+    """
+    Runs a request of a session in the worker process of its shard
+
+    Args:
+        session (int): id of the session
+        request (dict): the request
+
+    Returns:
+        dict: the response, with the time spent computing it
+    """
+    start = time.perf_counter()
+    op = request.get("op")
+    try:
+        if op == "new":
+            response = new_game(session, request)
+        elif op == "close":
+            SESSIONS.pop(session, None)
+            response = {}
+        else:
+            maze = SESSIONS.get(session)
+            if maze is None:
+                raise RuntimeError("There is no game, send a new request first")
+            engine = maze.engine
+            if op == "board":
+                response = {"board": str(maze)}
+            elif op in ["step", "auto"]:
+                if not engine.playing:
+                    raise RuntimeError("The game has finished")
+                if op == "auto":
+                    action, direction = engine.auto_action(maze.search), None
+                else:
+                    action, direction = request.get("action"), request.get("direction")
+                percept, reward, done, info = engine.step(action, direction)
+                response = game_state(maze, percept, info)
+                response.update(action=action, reward=reward, done=done)
+            else:
+                raise ValueError(f"Unknown op: {op}")
+        response["ok"] = True
+    except (ValueError, RuntimeError, TypeError) as e:
+        response = {"ok": False, "error": str(e)}
+    response["compute"] = time.perf_counter() - start
+    return response
+
+
+class GameServer:
+    """
+    Serves the game sessions of many connections
+    """
+
+    def __init__(self, workers=None) -> None:
+        """
+        Class constructor
+
+        Args:
+            workers (int, optional): number of shards, each with its own process.
+                Defaults to None, one per CPU.
+        """
+        self.shards = [
+            ProcessPoolExecutor(max_workers=1)
+            for _ in range(workers or os.cpu_count())
+        ]
+        self.ids = itertools.count()
+        self.metrics = Metrics()
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serves a connection until the client closes it or sends a close request.
+        The latency of every request, from its arrival to its response, and the
+        time spent computing it are recorded for the session
+
+        Args:
+            reader (asyncio.StreamReader): the requests
+            writer (asyncio.StreamWriter): the responses
+        """
+        loop = asyncio.get_running_loop()
+        session = next(self.ids)
+        shard = self.shards[session % len(self.shards)]
+        metrics = Metrics()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                start = metrics.clock()
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("A request must be a JSON object")
+                except ValueError as e:
+                    request = {}
+                    response = {"ok": False, "error": str(e)}
+                else:
+                    if request.get("op") == "stats":
+                        response = {"ok": True, "metrics": metrics.as_dict()}
+                    else:
+                        response = await loop.run_in_executor(
+                            shard, handle_request, session, request
+                        )
+                        metrics.observe("compute", response["compute"])
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+                metrics.count("requests")
+                metrics.record("latency", start)
+                if request.get("op") == "close":
+                    break
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            try:
+                await loop.run_in_executor(
+                    shard, handle_request, session, {"op": "close"}
+                )
+            except RuntimeError:
+                # The server is shutting down and the shard is gone
+                pass
+            writer.close()
+            self.report(session, metrics)
+
+    def report(self, session, metrics):
+        """
+        Prints the latency of a finished session and adds its metrics to the totals
+
+        Args:
+            session (int): id of the session
+            metrics (Metrics): metrics of the session
+        """
+        self.metrics.merge(metrics)
+        timings = metrics.as_dict()["timings"]
+        summary = {"session": session, "requests": metrics.counters.get("requests", 0)}
+        for name in ["latency", "compute"]:
+            if name in timings:
+                summary[f"{name}_ms"] = timings[name]["mean"] * 1000
+        print(json.dumps(summary), file=sys.stderr)
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT, path=None):
+        """
+        Accepts connections until the process is interrupted or terminated
+
+        Args:
+            host (str, optional): address of the TCP socket. Defaults to "127.0.0.1".
+            port (int, optional): port of the TCP socket. Defaults to DEFAULT_PORT.
+            path (str, optional): path of a Unix socket, used instead of TCP.
+                Defaults to None.
+        """
+        # Start the worker processes before the first client arrives
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *[loop.run_in_executor(shard, os.getpid) for shard in self.shards]
+        )
+        if path is not None:
+            server = await asyncio.start_unix_server(self.handle_connection, path)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port)
+        address = path or f"{host}:{port}"
+        print(f"Serving mazes on {address}", file=sys.stderr)
+        stop = loop.create_future()
+        for signum in [signal.SIGINT, signal.SIGTERM]:
+            try:
+                loop.add_signal_handler(signum, stop.cancel)
+            except NotImplementedError:
+                # Windows, where Ctrl+C raises KeyboardInterrupt instead
+                pass
+        async with server:
+            try:
+                await stop
+            except asyncio.CancelledError:
+                pass
+
+    def close(self):
+        """
+        Stops the worker processes
+        """
+        for shard in self.shards:
+            shard.shutdown(cancel_futures=True)
+
+
+def parse_args(argv=None):
+    """
+    Parses the command line
+
+    Args:
+        argv (list, optional): arguments. Defaults to None, the ones of the process.
+
+    Returns:
+        argparse.Namespace: the arguments
+    """
+    parser = argparse.ArgumentParser(description="Serve maze games over a socket")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", default=None, help="path of a Unix socket")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--metrics", default=None, help="JSON file for the metrics of every session"
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    game_server = GameServer(args.workers)
+    try:
+        asyncio.run(game_server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        game_server.close()
+        if args.metrics:
+            game_server.metrics.dump(args.metrics)
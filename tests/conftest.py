@@ -0,0 +1,19 @@
+import os
+import sys
+import pytest
+
+# The modules in src import each other as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import agents  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """
+    Keeps the compiled KBs of every test in its own directory. The environment
+    variable reaches worker processes that import agents again
+    """
+    monkeypatch.setenv("MAZE_KB_CACHE", str(tmp_path / "kb"))
+    monkeypatch.setattr(agents, "KB_CACHE_DIR", str(tmp_path / "kb"))
+    return tmp_path / "kb"
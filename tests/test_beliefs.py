@@ -0,0 +1,61 @@
+import random
+import numpy as np
+import pytest
+from agents import BayesianAgent
+from engine import BayesianEngine
+
+
+class FullBelief:
+    """
+    Reference update that rewrites every cell of the matrix, as the agent did
+    before the beliefs were kept in a NumPy array
+    """
+
+    def __init__(self, n):
+        self.n = n
+        self.matrix = np.full((n, n, 5), 1 / (n**2 - 1))
+        self.matrix[0, 0] = 0
+
+    def update(self, percept, position):
+        f, c = position
+        adjacents = [(f, c)] + [
+            (x, y)
+            for x, y in [(f - 1, c), (f + 1, c), (f, c - 1), (f, c + 1)]
+            if 0 <= x < self.n and 0 <= y < self.n
+        ]
+        inside = np.zeros((self.n, self.n), dtype=bool)
+        for cell in adjacents:
+            inside[cell] = True
+        for ind, felt in enumerate(percept):
+            prob_in_adj = self.matrix[inside, ind].sum()
+            if felt:
+                self.matrix[~inside, ind] = 0
+                self.matrix[inside, ind] /= prob_in_adj
+            else:
+                self.matrix[inside, ind] = 0
+                self.matrix[~inside, ind] /= 1 - prob_in_adj
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_marginal_beliefs_match_the_full_update(seed):
+    n = 6
+    rng = random.Random(seed)
+    engine = BayesianEngine(n, infer=False)
+    engine.reset(seed=seed)
+    agent = BayesianAgent(n)
+    reference = FullBelief(n)
+    cells = [(x, y) for x in range(n) for y in range(n)]
+    rng.shuffle(cells)
+    for x, y in cells[:15]:
+        engine.pos = [x, y]
+        percept = engine.read_percept()[:5]
+        agent.process_percepts(percept, [x, y])
+        reference.update(percept, (x, y))
+        assert np.allclose(np.asarray(agent.probability_matrix), reference.matrix)
+        assert np.allclose(
+            agent.probability_matrix[x][y], reference.matrix[x, y], atol=1e-12
+        )
+        rows, cols = np.divmod(np.arange(n * n), n)
+        assert np.allclose(
+            agent.probability_matrix[rows, cols], reference.matrix[rows, cols]
+        )
@@ -0,0 +1,47 @@
+import itertools
+import math
+import pytest
+import pycosat
+from agents import LogicalAgent
+
+
+@pytest.mark.parametrize("k", [0, 1, 2, 3])
+def test_counter_allows_exactly_k_instances(k):
+    n = 3
+    agent = LogicalAgent(n, counts={"P": k}, cache=False)
+    enc = agent.encoding
+    cells = [
+        enc.var(enc.PRECIPICE, x, y) for x, y in itertools.product(range(n), repeat=2)
+    ]
+    clauses = agent.cardinality_clauses(enc.PRECIPICE)
+    used = set(cells) | {abs(lit) for clause in clauses for lit in clause}
+    # Fix the variables the counter does not use, so every model is a placement
+    clauses += [[-var] for var in range(1, max(used) + 1) if var not in used]
+    placements = set()
+    for model in pycosat.itersolve(clauses):
+        chosen = frozenset(var for var in cells if model[var - 1] > 0)
+        assert len(chosen) == k
+        assert chosen not in placements, "the registers are not determined"
+        placements.add(chosen)
+    assert len(placements) == math.comb(n * n, k)
+
+
+def test_last_instances_are_inferred():
+    agent = LogicalAgent(4, cache=False)
+    enc = agent.encoding
+    logic = agent.logic
+    pits = [(1, 1), (2, 3), (3, 0)]
+    for x, y in pits[:2]:
+        logic.add_to_kb([enc.var(enc.PRECIPICE, x, y)])
+    # Two precipices are known: the third can be anywhere else
+    free = [(x, y) for x in range(4) for y in range(4) if (x, y) not in pits[:2]]
+    assert not any(logic.ask_kb([-enc.var(enc.PRECIPICE, x, y)]) for x, y in free)
+    for x, y in free:
+        if (x, y) != pits[2]:
+            logic.add_to_kb([-enc.var(enc.PRECIPICE, x, y)])
+    # Every other cell is free, so the third precipice must be the last one
+    assert logic.ask_kb([enc.var(enc.PRECIPICE, *pits[2])])
+    logic.add_to_kb([enc.var(enc.PRECIPICE, *pits[2])])
+    assert logic.ask_kb([-enc.var(enc.PRECIPICE, 0, 0)])
+    assert logic.check_kb_vs_clause_set([[enc.var(enc.MONSTER, 0, 1)]])
+    assert not logic.check_kb_vs_clause_set([[enc.var(enc.MONSTER, 1, 1)]])
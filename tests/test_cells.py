@@ -0,0 +1,55 @@
+import random
+from cells import CellSet
+
+
+def test_add_and_membership():
+    cells = CellSet(5)
+    assert cells.add([1, 2])
+    assert not cells.add((1, 2))
+    assert (1, 2) in cells and [1, 2] in cells
+    assert (2, 1) not in cells
+    assert (5, 0) not in cells and (-1, 0) not in cells
+    assert len(cells) == 1
+
+
+def test_iteration_keeps_insertion_order():
+    rng = random.Random(0)
+    order = [(x, y) for x in range(7) for y in range(7)]
+    rng.shuffle(order)
+    cells = CellSet(7, order + order[:5])
+    assert list(cells) == order
+    assert len(cells) == len(order)
+
+
+def test_added_since():
+    cells = CellSet(4, [(0, 0), (1, 1)])
+    seen = len(cells)
+    cells.add((3, 3))
+    cells.add((0, 0))
+    cells.add((2, 0))
+    assert cells.added_since(seen) == [(3, 3), (2, 0)]
+    assert cells.added_since(len(cells)) == []
+
+
+def test_update_with_cells_and_cell_sets():
+    rng = random.Random(1)
+    for _ in range(20):
+        n = rng.randint(1, 20)
+        first = [(rng.randrange(n), rng.randrange(n)) for _ in range(n)]
+        second = [(rng.randrange(n), rng.randrange(n)) for _ in range(n)]
+        cells = CellSet(n, first)
+        cells.update(CellSet(n, second))
+        assert set(cells) == set(first) | set(second)
+        assert len(cells) == len(set(first) | set(second))
+        assert list(cells)[: len(set(first))] == list(dict.fromkeys(first))
+        other = CellSet(n, first)
+        other.update(second)
+        assert set(other) == set(cells)
+        assert set(other.copy()) == set(other)
+        assert set(CellSet(n, first) | CellSet(n, second)) == set(cells)
+
+
+def test_large_maze_indices():
+    cells = CellSet(300, [(299, 299), (0, 1)])
+    assert list(cells) == [(299, 299), (0, 1)]
+    assert (299, 299) in cells
@@ -0,0 +1,22 @@
+import pytest
+from corpus import Corpus, generate_layouts, write_corpus
+from kurtz import ENGINES
+
+
+@pytest.mark.parametrize("maze", ["L", "B"])
+def test_too_small_maze_is_rejected(maze):
+    with pytest.raises(ValueError):
+        generate_layouts(maze, 2, 10, seed=0)
+
+
+@pytest.mark.parametrize("maze", ["L", "B"])
+def test_corpus_round_trip(tmp_path, maze):
+    fn = str(tmp_path / "layouts.npy")
+    write_corpus(fn, maze, 5, 300, seed=7, chunk=128)
+    corpus = Corpus(fn)
+    assert (corpus.maze, corpus.size, len(corpus)) == (maze, 5, 300)
+    engine = ENGINES[maze](5, infer=False)
+    for episode in range(len(corpus)):
+        engine.check_layout(corpus[episode])
+    write_corpus(fn + "2", maze, 5, 300, seed=7, chunk=128)
+    assert (Corpus(fn + "2").layouts == corpus.layouts).all()
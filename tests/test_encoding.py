@@ -0,0 +1,40 @@
+import itertools
+import pytest
+from agents import Logic, MazeEncoding
+
+
+@pytest.mark.parametrize("n", [3, 11, 12])
+def test_variables_are_unique_and_named(n):
+    enc = MazeEncoding(n)
+    variables = {}
+    for kind, name in enumerate(MazeEncoding.KINDS):
+        for row, col in itertools.product(range(n), repeat=2):
+            var = enc.var(kind, row, col)
+            assert var not in variables
+            variables[var] = f"{name}{row}_{col}"
+            assert enc.name(var) == f"{name}{row}_{col}"
+            assert enc.cell(var) == (row, col)
+    for cause in range(3):
+        for i in range(n * n):
+            for j in range(1, enc.counts[cause] + 1):
+                var = enc.counter(cause, i, j)
+                assert var not in variables
+                variables[var] = enc.name(var)
+    assert sorted(variables) == list(range(1, enc.num_vars + 1))
+    assert len(set(variables.values())) == len(variables)
+
+
+def test_names_of_large_mazes_are_not_ambiguous():
+    enc = MazeEncoding(12)
+    assert enc.name(enc.var(enc.PRECIPICE, 1, 11)) == "P1_11"
+    assert enc.name(enc.var(enc.PRECIPICE, 11, 1)) == "P11_1"
+    assert enc.stimulus(enc.EXIT, 11, 1) == enc.var(5, 11, 1)
+
+
+def test_logic_names_encoded_and_extra_symbols():
+    enc = MazeEncoding(11)
+    logic = Logic(enc)
+    extra = logic.to_number("-G")
+    assert extra == -(enc.num_vars + 1)
+    clause = [enc.var(enc.MONSTER, 10, 2), extra]
+    assert logic.dimacs_to_symbol(clause) == ["M10_2", "-G"]
@@ -0,0 +1,37 @@
+import pytest
+from engine import LogicalEngine, BayesianEngine
+
+
+@pytest.mark.parametrize("engine_class", [LogicalEngine, BayesianEngine])
+def test_too_small_maze_is_rejected(engine_class):
+    engine = engine_class(2, infer=False)
+    with pytest.raises(ValueError):
+        engine.reset(seed=0)
+
+
+@pytest.mark.parametrize("engine_class", [LogicalEngine, BayesianEngine])
+def test_smallest_maze_can_be_generated(engine_class):
+    for seed in range(50):
+        engine = engine_class(3, infer=False)
+        engine.reset(seed=seed)
+        assert len(engine.layout) == len(engine.elements)
+
+
+@pytest.mark.parametrize(
+    "engine_class, action, direction",
+    [
+        (LogicalEngine, "JUMP", None),
+        (LogicalEngine, "UP", "SIDEWAYS"),
+        (BayesianEngine, "BLOWGUN", None),
+        (BayesianEngine, "BLOWGUN", "SIDEWAYS"),
+    ],
+)
+def test_rejected_action_leaves_the_game_unchanged(engine_class, action, direction):
+    engine = engine_class(4, infer=False)
+    engine.reset(seed=0)
+    engine.step("DOWN" if engine.percept[engine.walls["DOWN"]] != 1 else "RIGHT")
+    before = engine.info()
+    with pytest.raises(ValueError):
+        engine.step(action, direction)
+    assert engine.info() == before
+    assert engine.playing
@@ -0,0 +1,36 @@
+import os
+import pytest
+from agents import LogicalAgent
+
+
+def test_cached_kb_matches_compiled_kb():
+    compiled = LogicalAgent(5, cache=False)
+    LogicalAgent(5)
+    loaded = LogicalAgent(5)
+    assert os.path.exists(loaded.cache_path())
+    assert loaded.logic.kb == [sorted(dimacs) for dimacs in compiled.logic.kb]
+    assert loaded.logic.clause_set == compiled.logic.clause_set
+    assert loaded.logic.symbols == compiled.logic.symbols
+    assert loaded.logic.propagator.value == compiled.logic.propagator.value
+
+
+@pytest.mark.parametrize(
+    "damage",
+    [
+        lambda data: b"",
+        lambda data: data[:10],
+        lambda data: data[:-7],
+        lambda data: data[:100] + bytes([data[100] ^ 1]) + data[101:],
+    ],
+    ids=["empty", "header", "truncated", "flipped"],
+)
+def test_damaged_cache_falls_back_to_compiling(damage):
+    fn = LogicalAgent(4).cache_path()
+    with open(fn, "rb") as f:
+        data = f.read()
+    with open(fn, "wb") as f:
+        f.write(damage(data))
+    agent = LogicalAgent(4)
+    assert agent.logic.clause_set == LogicalAgent(4, cache=False).logic.clause_set
+    with open(fn, "rb") as f:
+        assert f.read() == data
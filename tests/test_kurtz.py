@@ -0,0 +1,40 @@
+import json
+import pytest
+from corpus import write_corpus
+from kurtz import parse_args, play_episode, run_batch
+
+
+@pytest.mark.parametrize("maze", ["L", "B"])
+def test_batch_matches_sequential_episodes(tmp_path, maze):
+    output = tmp_path / "episodes.jsonl"
+    args = parse_args(
+        [
+            f"--maze={maze}",
+            "--size=5",
+            "--episodes=6",
+            "--seed=10",
+            "--workers=2",
+            "--max-steps=200",
+            f"--output={output}",
+        ]
+    )
+    totals = run_batch(args)
+    with open(output) as f:
+        episodes = [json.loads(line) for line in f]
+    assert totals["episodes"] == len(episodes) == 6
+    assert totals["wins"] == sum(episode["win"] for episode in episodes)
+    assert [episode["seed"] for episode in episodes] == list(range(10, 16))
+    for episode in episodes:
+        expected = play_episode(maze, 5, episode["seed"], max_steps=200)
+        assert episode["result"] == expected["result"]
+        assert episode["steps"] == expected["steps"]
+
+
+def test_batch_plays_the_layouts_of_a_corpus(tmp_path):
+    fn = str(tmp_path / "layouts.npy")
+    write_corpus(fn, "B", 5, 4, seed=3)
+    output = tmp_path / "episodes.jsonl"
+    args = parse_args([f"--corpus={fn}", "--workers=1", f"--output={output}"])
+    assert (args.maze, args.size, args.episodes) == ("B", 5, 4)
+    totals = run_batch(args)
+    assert totals["episodes"] == 4
@@ -0,0 +1,82 @@
+import itertools
+import random
+import pytest
+import pycosat
+from agents import Logic
+from engine import LogicalEngine, run_episode
+
+VARS = 6
+
+
+def models(clauses):
+    for values in itertools.product([False, True], repeat=VARS):
+        model = {v + 1 if value else -(v + 1) for v, value in enumerate(values)}
+        if all(any(lit in model for lit in clause) for clause in clauses):
+            yield model
+
+
+def entails(clauses, clause):
+    return all(any(lit in model for lit in clause) for model in models(clauses))
+
+
+def random_clause(rng, width):
+    variables = rng.sample(range(1, VARS + 1), width)
+    return [v if rng.random() < 0.5 else -v for v in variables]
+
+
+def random_kb(seed):
+    rng = random.Random(seed)
+    while True:
+        clauses = [random_clause(rng, rng.choice([1, 2, 2, 3])) for _ in range(8)]
+        if next(models(clauses), None) is not None:
+            return rng, clauses
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_ask_kb_matches_brute_force(seed):
+    rng, clauses = random_kb(seed)
+    logic = Logic()
+    logic.add_clause_list_to_kb(clauses)
+    for _ in range(30):
+        query = random_clause(rng, rng.choice([1, 1, 2]))
+        assert logic.ask_kb(query) == entails(clauses, query)
+    assert logic.stats["solver"] == logic.session.calls
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_backbone_matches_brute_force(seed):
+    _, clauses = random_kb(seed)
+    logic = Logic()
+    candidates = [v * sign for v in range(1, VARS + 1) for sign in [1, -1]]
+    for added in range(1, len(clauses) + 1):
+        logic.add_to_kb(clauses[added - 1])
+        expected = {lit for lit in candidates if entails(clauses[:added], [lit])}
+        assert logic.backbone(candidates) == expected
+    assert logic.stats["solver"] == logic.session.calls
+
+
+def test_backbone_counts_witnesses_apart_from_the_solver():
+    logic = Logic()
+    logic.add_clause_list_to_kb([[1, 2], [-3, 4]])
+    candidates = [1, -1, 2, -2, 3, -3, 4, -4]
+    assert logic.backbone(candidates) == set()
+    calls = logic.session.calls
+    assert logic.backbone(candidates) == set()
+    assert logic.session.calls == calls
+    assert logic.stats["witness"] >= len(candidates)
+    assert logic.stats["solver"] == calls
+
+
+@pytest.mark.parametrize("seed", [0, 1, 6])
+def test_backbone_of_game_kbs_matches_per_literal_queries(seed):
+    engine = LogicalEngine(5)
+    run_episode(engine, seed, max_steps=15)
+    agent = engine.agent
+    kb = [list(dimacs) for dimacs in agent.logic.kb]
+    assert engine.playing
+    logic = agent.logic
+    candidates = [
+        lit for x in range(5) for y in range(5) for lit in agent.cell_literals(x, y)
+    ]
+    expected = {lit for lit in candidates if pycosat.solve(kb + [[-lit]]) == "UNSAT"}
+    assert logic.backbone(candidates) == expected
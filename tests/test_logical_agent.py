@@ -0,0 +1,65 @@
+import pycosat
+import pytest
+from agents import LogicalAgent
+from engine import LogicalEngine, run_episode
+
+
+def entailed(kb, lit):
+    return pycosat.solve(kb + [[-lit]]) == "UNSAT"
+
+
+def brute_force(agent, known):
+    """
+    What asking the KB about every unknown cell finds, as the agent did before it
+    kept track of dirty literals and proven cells: the cells that surely hold the
+    monster, a precipice or the exit, and the safe cells next to known ones
+    """
+    kb = [list(dimacs) for dimacs in agent.logic.kb]
+    found = {}
+    for x in range(agent.n):
+        for y in range(agent.n):
+            if (x, y) in known:
+                continue
+            m, p, s = agent.cell_literals(x, y)[:3]
+            adjacent = any(cell in known for cell in agent.get_adjacents(x, y))
+            if entailed(kb, m):
+                found[(x, y)] = "monster"
+            elif entailed(kb, p):
+                found[(x, y)] = "precipice"
+            elif entailed(kb, s):
+                found[(x, y)] = "exit"
+            elif adjacent and all(entailed(kb, -lit) for lit in (m, p, s)):
+                found[(x, y)] = "safe"
+    return found
+
+
+@pytest.mark.parametrize(
+    "n, seed", [(4, 0), (4, 4), (5, 0), (5, 1), (5, 6), (6, 0), (6, 8)]
+)
+def test_discoveries_match_brute_force(monkeypatch, n, seed):
+    discovered = {}
+    steps = []
+    process_percept = LogicalAgent.process_percept
+
+    def checked(agent, percept, position, known_cells, at_exit, at_monster):
+        result = process_percept(
+            agent, percept, position, known_cells, at_exit, at_monster
+        )
+        for kind, cells in zip(["safe", "monster", "precipice", "exit"], result):
+            for x, y in cells:
+                assert (x, y) not in discovered, "a cell was reported twice"
+                discovered[(x, y)] = kind
+        if not engine.playing:
+            # The player has died in the cell the percept claims is safe
+            return result
+        known = set(known_cells)
+        expected = brute_force(agent, known)
+        found = {cell: kind for cell, kind in discovered.items() if cell not in known}
+        assert found == expected
+        steps.append(position)
+        return result
+
+    monkeypatch.setattr(LogicalAgent, "process_percept", checked)
+    engine = LogicalEngine(n)
+    run_episode(engine, seed, max_steps=40)
+    assert len(steps) > 1
@@ -0,0 +1,61 @@
+import itertools
+import numpy as np
+import pytest
+from agents import ParticleBelief
+from engine import BayesianEngine
+
+
+def exact_marginals(n, observations):
+    """
+    Probability of each of the 5 causes in each cell, by enumerating every
+    layout allowed by the maze generation and consistent with the percepts
+    """
+    cells = np.arange(1, n * n)
+    layouts = np.array(list(itertools.product(cells, repeat=6)))
+    traps, others = layouts[:, :3, None], layouts[:, None, 3:]
+    keep = ~(traps == others).any(axis=(1, 2))
+    for percept, (x, y) in observations:
+        rows, cols = np.divmod(layouts[:, :5], n)
+        near = np.abs(rows - x) + np.abs(cols - y) <= 1
+        keep &= (near == np.asarray(percept, dtype=bool)).all(axis=1)
+    layouts = layouts[keep]
+    matrix = np.zeros((n * n, 5))
+    for cause in range(5):
+        matrix[:, cause] = np.bincount(layouts[:, cause], minlength=n * n)
+    return (matrix / len(layouts)).reshape(n, n, 5)
+
+
+def observations(n, seed, positions):
+    engine = BayesianEngine(n, infer=False)
+    engine.reset(seed=seed)
+    result = []
+    for position in positions:
+        engine.pos = list(position)
+        result.append((engine.read_percept()[:5], position))
+    return result
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_particle_marginals_match_exact_enumeration(seed):
+    n = 3
+    seen = observations(n, seed, [(0, 0), (1, 0), (1, 1)])
+    beliefs = ParticleBelief(n, particles=20000, seed=seed)
+    for percept, position in seen:
+        beliefs.update(percept, position)
+    expected = exact_marginals(n, seen)
+    assert np.abs(beliefs.probability_matrix - expected).max() < 0.03
+
+
+def test_particles_keep_the_constraints_after_resampling():
+    n = 5
+    beliefs = ParticleBelief(n, particles=3000, seed=4)
+    path = [(0, 0), (1, 0), (1, 1), (2, 1), (2, 2), (3, 2)]
+    for percept, position in observations(n, 4, path):
+        beliefs.update(percept, position)
+        beliefs.resample()
+        particles = beliefs.particles
+        assert beliefs.valid(particles).all()
+        for element in range(6):
+            assert beliefs.allowed[element, particles[:, element]].all()
+        assert (particles != 0).all()
+        assert np.isclose(beliefs.weights.sum(), 1)
@@ -0,0 +1,53 @@
+import io
+import os
+import pytest
+import render
+from labyrinth import LogicalMaze
+
+
+def play(size, terminal, monkeypatch, steps=6):
+    monkeypatch.setattr(
+        render.shutil, "get_terminal_size", lambda: os.terminal_size(terminal)
+    )
+    maze = LogicalMaze(size, auto=True, seed=1, render="diff", play=False)
+    out = io.StringIO()
+    maze.renderer.out = out
+    maze.renderer.frame()
+    for _ in range(steps):
+        if not maze.engine.playing:
+            break
+        out.seek(0)
+        out.truncate()
+        maze.engine.step(maze.engine.auto_action(maze.search))
+        maze.renderer.frame()
+    return maze, out.getvalue()
+
+
+def test_diff_frames_in_a_large_terminal(monkeypatch):
+    maze, frame = play(4, (80, 40), monkeypatch)
+    assert render.CLEAR_SCREEN not in frame
+    assert maze.renderer.board() not in frame
+
+
+@pytest.mark.parametrize("terminal", [(80, 24), (20, 200)])
+def test_full_frames_when_the_board_does_not_fit(monkeypatch, terminal):
+    maze, frame = play(8, terminal, monkeypatch)
+    assert "\x1b[" not in frame
+    assert frame.startswith(maze.renderer.board())
+
+
+def test_flush_writes_every_message_after_the_deque_fills(monkeypatch):
+    maze, _ = play(4, (80, 40), monkeypatch, steps=0)
+    out = io.StringIO()
+    maze.renderer.out = out
+    for ind in range(20):
+        maze.renderer.message(f"message {ind}")
+        maze.renderer.flush()
+    assert out.getvalue().splitlines() == [f"message {ind}" for ind in range(20)]
+    out.seek(0)
+    out.truncate()
+    for ind in range(20):
+        maze.renderer.message(f"burst {ind}")
+    maze.renderer.flush()
+    maze.renderer.flush()
+    assert out.getvalue().splitlines() == [f"burst {ind}" for ind in range(12, 20)]
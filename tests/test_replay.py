@@ -0,0 +1,19 @@
+import pytest
+from kurtz import play_episode
+from replay import read_replays
+
+
+@pytest.mark.parametrize("maze", ["L", "B"])
+def test_replay_round_trip(tmp_path, maze):
+    episodes = [
+        play_episode(maze, 5, seed, max_steps=200, replay_dir=str(tmp_path))
+        for seed in range(3)
+    ]
+    for seed, episode in enumerate(episodes):
+        replays = read_replays(str(tmp_path / f"{maze}5-{seed}.bin"))
+        assert len(replays) == 1
+        replay = replays[0]
+        assert len(replay) == episode["steps"]
+        engine = replay.engine_at(len(replay))
+        assert (engine.result or "unfinished") == episode["result"]
+        replay.engine_at(len(replay) // 2)
@@ -0,0 +1,109 @@
+import random
+from collections import deque
+import pytest
+from cells import CellSet
+from engine import BayesianEngine
+from metrics import Metrics
+from search_algorithms import LogicalSearch, SearchAlgorithms
+
+
+def bfs_distance(n, start, goal, visited):
+    """
+    Length of the shortest path between two visited cells, by plain BFS
+    """
+    distances = {start: 0}
+    queue = deque([start])
+    while queue:
+        row, col = queue.popleft()
+        for cell in [(row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)]:
+            if cell in visited and cell not in distances:
+                distances[cell] = distances[(row, col)] + 1
+                queue.append(cell)
+    return distances.get(goal)
+
+
+def check_path(path, start, goal, visited):
+    current = start
+    for cell in path:
+        assert abs(cell[0] - current[0]) + abs(cell[1] - current[1]) == 1
+        assert cell in visited
+        current = cell
+    assert current == goal
+
+
+def random_visited(n, rng, density=0.7):
+    visited = CellSet(n)
+    for x in range(n):
+        for y in range(n):
+            if rng.random() < density:
+                visited.add((x, y))
+    return visited
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_a_star_finds_shortest_paths(seed):
+    rng = random.Random(seed)
+    n = 8
+    visited = random_visited(n, rng)
+    cells = list(visited)
+    start, goal = rng.choice(cells), rng.choice(cells)
+    path = SearchAlgorithms(n).a_star_on_known(start, goal, visited)
+    expected = bfs_distance(n, start, goal, visited)
+    if expected is None:
+        assert path is None
+    else:
+        check_path(path, start, goal, visited)
+        assert len(path) == expected
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_way_out_is_a_shortest_path(seed):
+    rng = random.Random(seed)
+    n = 8
+    visited = random_visited(n, rng, density=0.8)
+    cells = list(visited)
+    pos, exit_pos = rng.choice(cells), rng.choice(cells)
+    while pos == exit_pos or bfs_distance(n, pos, exit_pos, visited) is None:
+        pos, exit_pos = rng.choice(cells), rng.choice(cells)
+    metrics = Metrics()
+    search = LogicalSearch(n, metrics)
+    search.kurt_found = True
+    search.exit_pos = list(exit_pos)
+    actions = []
+    while not actions or actions[-1] != "EXIT":
+        actions.append(search.give_next_move(CellSet(n), list(pos), visited))
+    assert len(actions) == bfs_distance(n, pos, exit_pos, visited) + 1
+    assert metrics.counters["astar_expansions"] > 0
+
+
+@pytest.mark.parametrize(
+    "backend,seed", [("marginal", seed) for seed in range(4)] + [("particles", 0)]
+)
+def test_greedy_move_is_the_least_risky_frontier_cell(backend, seed):
+    n = 10
+    metrics = Metrics()
+    engine = BayesianEngine(n, backend=backend, metrics=metrics)
+    search = engine.new_search()
+    engine.reset(seed=seed)
+    choose_greedy_move = search.choose_greedy_move
+    choices = []
+
+    def checked(probability_matrix):
+        # one read per cell, as the search did before ranking the frontier at once
+        expected = min(
+            search.frontier,
+            key=lambda cell: (
+                sum(probability_matrix[cell[0]][cell[1]][:4]),
+                search.frontier.order(cell),
+            ),
+        )
+        choice = choose_greedy_move(probability_matrix)
+        assert choice == expected
+        choices.append(len(search.frontier))
+        return choice
+
+    search.choose_greedy_move = checked
+    while engine.playing and engine.steps < 300:
+        engine.step(engine.auto_action(search))
+    assert len(choices) > 5
+    assert metrics.counters["cells_ranked"] == sum(choices)
@@ -0,0 +1,24 @@
+import pytest
+import server
+
+
+def test_too_small_maze_is_rejected():
+    response = server.handle_request(0, {"op": "new", "maze": "L", "size": 2})
+    assert not response["ok"]
+    assert "size" in response["error"]
+
+
+@pytest.mark.parametrize("maze", ["L", "B"])
+def test_session_plays_auto_steps(maze):
+    response = server.handle_request(
+        1, {"op": "new", "maze": maze, "size": 4, "seed": 3}
+    )
+    assert response["ok"]
+    for _ in range(5):
+        response = server.handle_request(1, {"op": "auto"})
+        assert response["ok"], response.get("error")
+        assert response["info"]["steps"] >= 1
+        if response["done"]:
+            break
+    assert server.handle_request(1, {"op": "close"})["ok"]
+    assert 1 not in server.SESSIONS